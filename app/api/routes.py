@@ -15,9 +15,16 @@ from app.database import db_manager, get_db_session
 from app.models.auth import User
 from app.llm_client import get_llm_client
 from app.prompts import get_system_prompt  # NEW: Production-grade prompts
-from app.models.conversation import ConversationRequest, ConversationResponse
+from app.models.conversation import (
+    ConversationBatchRequest,
+    ConversationBatchResponse,
+    ConversationRequest,
+    ConversationResponse,
+)
 from app.models.memory import (
+    EmbeddingWarmRequest,
     Memory,
+    MemoryBatchSearchQuery,
     MemoryCreate,
     MemorySearchQuery,
     MemorySearchResult,
@@ -127,7 +134,7 @@ async def _generate_conversation_title(
         from app.services.conversation_manager import ConversationManager
         
         # Generate title
-        title = title_generator.generate_title(first_message)
+        title = await title_generator.generate_title_cached(first_message, db_manager.redis)
         
         # Update conversation with new title
         async with db_manager._session_factory() as session:
@@ -163,7 +170,9 @@ async def _check_duplicate_content(
     """
     try:
         # Get recent memories for user (last 50)
-        recent_memories = await storage.get_user_memories(user_id=user_id, limit=50)
+        recent_memories = await storage.get_user_memories(
+            user_id=user_id, limit=50, include_embedding=True
+        )
         
         # Generate embedding for new content
         from app.utils.embeddings import EmbeddingGenerator
@@ -677,6 +686,7 @@ async def process_conversation(
                     await update_session.execute(text(query), params)
                     await update_session.commit()
                     logger.info(f"Updated last_used_turn for {len(memory_ids_to_update)} memories")
+                await storage.invalidate_user_cache(current_user.user_id)
             except Exception as e:
                 logger.warning(f"Failed to update last_used_turn: {e}")
 
@@ -701,6 +711,46 @@ async def process_conversation(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/conversation/batch", response_model=ConversationBatchResponse)
+async def process_conversation_batch(
+    batch: ConversationBatchRequest,
+    current_user: User = Depends(get_current_user),
+    storage: MemoryStorage = Depends(get_memory_storage),
+    retriever: MemoryRetriever = Depends(get_memory_retriever),
+    extractor: MemoryExtractor = Depends(get_memory_extractor),
+    conversation_storage: ConversationStorage = Depends(get_conversation_storage),
+    conversation_manager: ConversationManager = Depends(get_conversation_manager),
+):
+    """Process consecutive turns of one conversation in a single request.
+    
+    Turns are processed in order, exactly as separate /conversation calls
+    would be, so each one sees the conversation the previous turns created;
+    what the batch saves is the client round trip per turn.
+    """
+    conversation_id = batch.conversation_id
+    responses = []
+    for turn in batch.turns:
+        response = await process_conversation(
+            ConversationRequest(
+                conversation_id=conversation_id,
+                turn_number=turn.turn_number,
+                message=turn.message,
+                metadata=turn.metadata,
+                include_memories=batch.include_memories,
+            ),
+            current_user=current_user,
+            storage=storage,
+            retriever=retriever,
+            extractor=extractor,
+            conversation_storage=conversation_storage,
+            conversation_manager=conversation_manager,
+        )
+        conversation_id = response.conversation_id
+        responses.append(response)
+
+    return ConversationBatchResponse(conversation_id=conversation_id, responses=responses)
+
+
 async def _extract_and_store_memories(
     user_id: str,
     turn_number: int,
@@ -753,6 +803,42 @@ async def search_memories(
     return await retriever.search(search_query)
 
 
+@router.post("/memories/search/batch", response_model=list[list[MemorySearchResult]])
+async def search_memories_batch(
+    batch: MemoryBatchSearchQuery,
+    current_user: User = Depends(get_current_user),
+    retriever: MemoryRetriever = Depends(get_memory_retriever),
+):
+    """Run several memory searches for the authenticated user at once.
+    
+    Results are aligned with ``batch.queries``. The searches run concurrently,
+    so their query embeddings are generated together in one batch.
+    """
+    return await asyncio.gather(*(
+        retriever.search(MemorySearchQuery(
+            user_id=current_user.user_id,
+            query=query,
+            top_k=batch.top_k,
+        ))
+        for query in batch.queries
+    ))
+
+
+@router.post("/embeddings/warm")
+async def warm_embeddings(
+    request: EmbeddingWarmRequest,
+    current_user: User = Depends(get_current_user),
+    embedder: EmbeddingGenerator = Depends(get_embedding_generator),
+):
+    """Embed texts ahead of time so a later search on them hits the cache.
+    
+    Clients that know an upcoming query can call this a few turns early; the
+    search then skips the embedding round trip.
+    """
+    await embedder.generate_batch(request.texts)
+    return {"warmed": len(request.texts)}
+
+
 @router.get("/memories/list", response_model=list[Memory])
 async def list_memories(
     current_user: User = Depends(get_current_user),
@@ -1097,7 +1183,7 @@ async def export_conversation(
 # ============================================================================
 
 from fastapi import UploadFile, File, Form
-from app.services.vision_service import vision_service
+from app.services.vision_service import VisionService, get_vision_service
 
 
 @router.post("/vision/analyze", tags=["Vision"])
@@ -1107,6 +1193,7 @@ async def analyze_image(
     save_to_memory: bool = Form(True),
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_db_session),
+    vision_service: VisionService = Depends(get_vision_service),
 ):
     """
     Analyze an image or document using AI.
@@ -1155,7 +1242,11 @@ async def analyze_image(
             
             # Process image (resize, optimize, encode)
             logger.info("🔄 Processing image...")
-            image_base64 = vision_service.process_image(file_bytes)
+            # Decoding is the real integrity check for the image
+            try:
+                image_base64 = await vision_service.process_image_async(file_bytes)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid image file: {e}")
             
             # Analyze with vision model
             logger.info("🤖 Analyzing with Groq Vision...")
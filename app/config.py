@@ -59,6 +59,7 @@ class Settings(BaseSettings):
     llm_provider: Literal["openai", "anthropic", "groq"] = "groq"
     embedding_provider: Literal["openai", "sentence-transformers"] = "sentence-transformers"
     embedding_model: str = "all-MiniLM-L6-v2"
+    embedding_backend: Literal["torch", "onnx", "onnx-int8"] = "torch"  # sentence-transformers runtime
 
     # Authentication
     jwt_secret_key: str = Field(default="your-secret-key-change-in-production-min-32-chars")
@@ -77,7 +78,10 @@ class Settings(BaseSettings):
     max_context_tokens: int = 4000
     retrieval_timeout_ms: int = 50
     batch_embedding_size: int = 100
-    connection_pool_size: int = 10
+    embedding_concurrency: int = 4  # concurrent OpenAI embedding requests
+    connection_pool_size: int = 20
+    connection_pool_max_overflow: int = 40
+    connection_pool_recycle: int = 1800  # seconds
 
     # Celery
     celery_broker_url: str = "redis://localhost:6379/1"
@@ -11,6 +11,7 @@ except ImportError:
     PINECONE_AVAILABLE = False
     Pinecone = None
     ServerlessSpec = None
+import orjson
 from redis import asyncio as aioredis
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
@@ -21,6 +22,11 @@ logger = logging.getLogger(__name__)
 settings = get_settings()
 
 
+def _orjson_dumps(value) -> str:
+    """Serialize JSON for the driver, which expects ``str``."""
+    return orjson.dumps(value).decode()
+
+
 class DatabaseManager:
     """Manage database connections and lifecycle."""
 
@@ -55,7 +61,7 @@ class DatabaseManager:
                         user_id VARCHAR(255) NOT NULL,
                         type VARCHAR(50) NOT NULL,
                         content TEXT NOT NULL,
-                        embedding vector(384),
+                        embedding halfvec(384),
                         source_turn INTEGER NOT NULL,
                         created_at TIMESTAMP NOT NULL DEFAULT NOW(),
                         last_accessed TIMESTAMP,
@@ -159,9 +165,21 @@ class DatabaseManager:
             self._engine = create_async_engine(
                 settings.postgres_async_url,
                 pool_size=settings.connection_pool_size,
-                max_overflow=settings.connection_pool_size * 2,
+                max_overflow=settings.connection_pool_max_overflow,
                 pool_pre_ping=True,
+                # Replace connections before proxies/firewalls silently drop them
+                pool_recycle=settings.connection_pool_recycle,
+                connect_args={
+                    "server_settings": {
+                        "tcp_keepalives_idle": "60",
+                        "tcp_keepalives_interval": "10",
+                        "tcp_keepalives_count": "3",
+                    },
+                },
                 echo=settings.log_level == "DEBUG",
+                # JSON/JSONB columns are encoded and decoded with orjson
+                json_serializer=_orjson_dumps,
+                json_deserializer=orjson.loads,
             )
 
             self._session_factory = async_sessionmaker(
@@ -309,3 +327,41 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for FastAPI to get database session."""
     async with db_manager.get_session() as session:
         yield session
+
+
+# NULL when the index doesn't exist, false when a concurrent build left it INVALID
+_INDEX_IS_VALID_SQL = text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)")
+
+
+async def create_index_concurrently(conn, name: str, create_sql: str) -> None:
+    """Build an index with CREATE INDEX CONCURRENTLY IF NOT EXISTS, and verify it.
+    
+    A failed or cancelled concurrent build leaves an INVALID index behind,
+    which IF NOT EXISTS would then skip on every later run while nothing is
+    enforced. Such a leftover is dropped and rebuilt; a build that still
+    ends up invalid is dropped again and raises.
+    
+    Args:
+        conn: Connection in AUTOCOMMIT mode
+        name: Index name, as used in ``create_sql``
+        create_sql: The CREATE [UNIQUE] INDEX CONCURRENTLY IF NOT EXISTS statement
+        
+    Raises:
+        RuntimeError: If the index is invalid after the build
+    """
+    drop = text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    if await conn.scalar(_INDEX_IS_VALID_SQL, {"name": name}) is False:
+        logger.warning(f"Dropping invalid index {name} left by an earlier build")
+        await conn.execute(drop)
+
+    try:
+        await conn.execute(text(create_sql))
+    except Exception:
+        if await conn.scalar(_INDEX_IS_VALID_SQL, {"name": name}) is False:
+            await conn.execute(drop)
+        raise
+
+    if not await conn.scalar(_INDEX_IS_VALID_SQL, {"name": name}):
+        await conn.execute(drop)
+        raise RuntimeError(f"Index {name} is invalid after a concurrent build")
@@ -1,9 +1,10 @@
 """Main FastAPI application - Production Grade."""
 
+import asyncio
 import os
 import logging
 import sys
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 # 🔧 FIX: Disable Torch Dynamo to prevent ONNX import errors
 os.environ["TORCH_DISABLE_DYNAMO"] = "1"
@@ -123,6 +124,10 @@ async def lifespan(app: FastAPI):
             except Exception as e:
                 logger.warning(f"⚠️ Embedding model warmup failed: {e}")
         
+        # Buffered metric counters are pushed to Prometheus in the background
+        from app.utils.metrics import metrics
+        metrics_flusher = asyncio.create_task(metrics.flush_periodically())
+        
         logger.info("🎉 System ready to serve requests")
         
     except Exception as e:
@@ -135,6 +140,11 @@ async def lifespan(app: FastAPI):
     logger.info("🛑 Shutting down Long-Form Memory System")
     
     try:
+        # Stop the metrics flusher (it flushes once more on the way out)
+        metrics_flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await metrics_flusher
+        
         # Close database connections gracefully
         await db_manager.close()
         logger.info("✅ Database connections closed")
@@ -230,6 +240,15 @@ if settings.rate_limit_enabled:
 app.add_middleware(RequestLoggingMiddleware)
 
 
+def _endpoint_label(request: Request) -> str:
+    """Metrics label for a request: its route template, not the raw path.
+    
+    Raw paths embed IDs, which would create a new series per memory/user.
+    """
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
 # Request timing and metrics middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
@@ -249,7 +268,7 @@ async def add_process_time_header(request: Request, call_next):
         try:
             from app.utils.metrics import metrics
             metrics.record_request(
-                endpoint=request.url.path,
+                endpoint=_endpoint_label(request),
                 method=request.method,
                 status=response.status_code,
                 duration=process_time,
@@ -266,7 +285,7 @@ async def add_process_time_header(request: Request, call_next):
         try:
             from app.utils.metrics import metrics
             metrics.record_request(
-                endpoint=request.url.path,
+                endpoint=_endpoint_label(request),
                 method=request.method,
                 status=500,
                 duration=process_time,
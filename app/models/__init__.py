@@ -1,6 +1,9 @@
 """Models package initialization."""
 
 from app.models.conversation import (
+    ConversationBatchRequest,
+    ConversationBatchResponse,
+    ConversationBatchTurn,
     ConversationContext,
     ConversationHistory,
     ConversationRequest,
@@ -8,7 +11,9 @@ from app.models.conversation import (
     ConversationTurn,
 )
 from app.models.memory import (
+    EmbeddingWarmRequest,
     Memory,
+    MemoryBatchSearchQuery,
     MemoryConsolidation,
     MemoryCreate,
     MemoryMetadata,
@@ -27,13 +32,18 @@ __all__ = [
     "MemoryCreate",
     "MemoryUpdate",
     "MemorySearchQuery",
+    "MemoryBatchSearchQuery",
     "MemorySearchResult",
     "MemoryConsolidation",
     "MemoryStats",
+    "EmbeddingWarmRequest",
     # Conversation models
     "ConversationTurn",
     "ConversationRequest",
     "ConversationResponse",
+    "ConversationBatchTurn",
+    "ConversationBatchRequest",
+    "ConversationBatchResponse",
     "ConversationContext",
     "ConversationHistory",
 ]
@@ -77,6 +77,29 @@ class ConversationResponse(BaseModel):
         }
 
 
+class ConversationBatchTurn(BaseModel):
+    """One turn of a batched conversation request."""
+
+    turn_number: int = Field(..., ge=0)
+    message: str = Field(..., min_length=1, max_length=10000)
+    metadata: dict[str, Any] = Field(default_factory=dict)
+
+
+class ConversationBatchRequest(BaseModel):
+    """Request to process several consecutive turns in one call."""
+
+    conversation_id: Optional[UUID] = None  # None = new conversation
+    turns: list[ConversationBatchTurn] = Field(..., min_length=1, max_length=20)
+    include_memories: bool = Field(default=True)
+
+
+class ConversationBatchResponse(BaseModel):
+    """Responses to a batched conversation request, in turn order."""
+
+    conversation_id: UUID
+    responses: list[ConversationResponse]
+
+
 class ConversationContext(BaseModel):
     """Context for LLM including relevant memories."""
 
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 from enum import Enum
-from typing import Any, Optional
+from typing import Annotated, Any, Optional
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field, field_validator
@@ -120,6 +120,23 @@ class MemorySearchQuery(BaseModel):
     current_turn: Optional[int] = Field(None, ge=0)
 
 
+class MemoryBatchSearchQuery(BaseModel):
+    """Schema for running several memory searches in one request."""
+
+    queries: list[Annotated[str, Field(min_length=1, max_length=500)]] = Field(
+        ..., min_length=1, max_length=20
+    )
+    top_k: int = Field(default=10, ge=1, le=50)
+
+
+class EmbeddingWarmRequest(BaseModel):
+    """Schema for pre-populating the embedding cache ahead of a query."""
+
+    texts: list[Annotated[str, Field(min_length=1, max_length=500)]] = Field(
+        ..., min_length=1, max_length=20
+    )
+
+
 class MemorySearchResult(BaseModel):
     """Result from memory search with relevance score."""
 
@@ -98,7 +98,9 @@ class MemoryManager:
             List of consolidation results
         """
         try:
-            memories = await self.storage.get_user_memories(user_id, limit=500)
+            memories = await self.storage.get_user_memories(
+                user_id, limit=500, include_embedding=True
+            )
             consolidations = []
 
             # Track which memories have been consolidated
@@ -181,7 +183,9 @@ class MemoryManager:
             Number of conflicts resolved
         """
         try:
-            memories = await self.storage.get_user_memories(user_id, limit=500)
+            memories = await self.storage.get_user_memories(
+                user_id, limit=500, include_embedding=True
+            )
             resolved_count = 0
 
             # Group memories by type
@@ -199,7 +203,7 @@ class MemoryManager:
                         if not mem1.embedding or not mem2.embedding:
                             continue
 
-                        similarity = await self.embedder.similarity(
+                        similarity = self.embedder.similarity(
                             mem1.embedding,
                             mem2.embedding,
                         )
@@ -4,10 +4,11 @@ import asyncio
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Sequence
 from uuid import UUID
 from enum import Enum
 
+import numpy as np
 from redis import asyncio as aioredis
 
 from app.config import get_settings
@@ -184,7 +185,21 @@ class MemoryRetriever:
                 results = []
                 current_turn = query.current_turn or 0
 
+                # Recency for every candidate in one vectorized pass; a match
+                # whose source_turn can't be read is skipped, as any other
+                # malformed result is below
+                matches = []
+                source_turns = []
                 for match in search_results.matches:
+                    try:
+                        source_turns.append(int(match.metadata.get('source_turn', 0)))
+                    except Exception as e:
+                        logger.warning(f"Error processing search result: {e}")
+                        continue
+                    matches.append(match)
+                recency_scores = self._calculate_recency_scores(source_turns, current_turn)
+
+                for match, source_turn, recency_score in zip(matches, source_turns, recency_scores):
                     try:
                         # Extract metadata
                         metadata = match.metadata
@@ -206,12 +221,7 @@ class MemoryRetriever:
                         importance_score = float(metadata.get('importance_score', 0.7))
                         importance_level = metadata.get('importance_level', 'medium')
 
-                        # Calculate recency score
-                        source_turn = int(metadata.get('source_turn', 0))
-                        recency_score = self._calculate_recency_score(
-                            source_turn,
-                            current_turn,
-                        )
+                        recency_score = float(recency_score)
 
                         # Get access count from metadata
                         access_count = int(metadata.get('access_count', 0))
@@ -340,6 +350,27 @@ class MemoryRetriever:
 
         return max(recency_score, 0.1)  # Minimum score of 0.1
 
+    def _calculate_recency_scores(
+        self,
+        source_turns: Sequence[int],
+        current_turn: int,
+    ) -> np.ndarray:
+        """Vectorized _calculate_recency_score over many memories at once.
+        
+        Args:
+            source_turns: Turn when each memory was created
+            current_turn: Current conversation turn
+            
+        Returns:
+            Array of recency scores between 0.1 and 1, in input order
+        """
+        if current_turn <= 0:
+            return np.ones(len(source_turns))
+
+        # Future or same-turn memories score 1.0 (distance clamped to 0)
+        turn_distance = np.maximum(current_turn - np.asarray(source_turns, dtype=np.int64), 0)
+        return np.maximum(0.993 ** turn_distance, 0.1)
+
     def _calculate_relevance_score(
         self,
         similarity: float,
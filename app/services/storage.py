@@ -1,14 +1,20 @@
 """Storage service for memory persistence."""
 
 import asyncio
-import json
 import logging
+import struct
+import time
 from datetime import datetime
-from typing import Optional
-from uuid import UUID
+from functools import lru_cache
+from typing import AsyncIterator, Optional, Sequence
+from uuid import UUID, uuid4
 
+import lz4.frame
+import numpy as np
+import orjson
 from redis import asyncio as aioredis
-from sqlalchemy import and_, delete, func, select, update, text
+from sqlalchemy import and_, bindparam, delete, func, select, update, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
@@ -22,11 +28,243 @@ from app.models.memory import (
     MemoryUpdate,
 )
 from app.utils.embeddings import EmbeddingGenerator
+from app.utils.memory_weight import MemoryWeightCalculator
 from app.utils.metrics import metrics, track_time
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Leading byte of every cached memory payload. Bump it whenever the layout
+# changes so entries written by older code are treated as cache misses.
+CACHE_SCHEMA_VERSION = b"\x02"
+_HEADER_LEN = struct.Struct("<I")
+
+# Payloads larger than this are stored lz4-compressed behind a tag byte
+_COMPRESS_MIN_BYTES = 1024
+_LZ4_TAG = b"\x80"
+
+
+# Row count above which get_user_memories parses embeddings off the event loop
+_THREADED_HYDRATE_MIN_ROWS = 32
+
+_MEMORY_COLUMNS = """
+    memory_id, user_id, type, content, {embedding},
+    source_turn, created_at, last_accessed, access_count,
+    confidence, decay_score, tags, entities, last_used_turn
+"""
+
+
+def _memory_columns(include_embedding: bool = True) -> str:
+    """Build the memory SELECT list.
+
+    Without the embedding a NULL placeholder keeps the column positions
+    stable, so ``MemoryStorage._row_to_memory`` handles both shapes.
+    """
+    embedding = "embedding::text" if include_embedding else "NULL::text AS embedding"
+    return _MEMORY_COLUMNS.format(embedding=embedding)
+
+
+_INSERT_MEMORY_SQL = text("""
+    INSERT INTO memories (
+        memory_id, user_id, type, content, embedding,
+        source_turn, created_at, confidence, importance_score, importance_level,
+        tags, entities, last_used_turn
+    ) VALUES (
+        :memory_id, :user_id, :type, :content, :embedding,
+        :source_turn, :created_at, :confidence, :importance_score, :importance_level,
+        :tags, :entities, :last_used_turn
+    )
+""").bindparams(bindparam("tags", type_=JSONB), bindparam("entities", type_=JSONB))
+
+_GET_MEMORY_SQL = text(f"""
+    SELECT {_memory_columns()}
+    FROM memories
+    WHERE memory_id = :memory_id
+""")
+
+_GET_MEMORIES_SQL = text(f"""
+    SELECT {_memory_columns()}
+    FROM memories
+    WHERE memory_id = ANY(CAST(:memory_ids AS uuid[]))
+""")
+
+_UPDATE_IMPORTANCE_SQL = text("""
+    UPDATE memories
+    SET importance_score = :importance_score,
+        importance_level = :importance_level
+    WHERE memory_id = :memory_id
+    RETURNING user_id
+""")
+
+_UPDATE_CONTEXT_SQL = text("""
+    UPDATE memories
+    SET context = :context
+    WHERE memory_id = :memory_id
+    RETURNING user_id
+""").bindparams(bindparam("context", type_=JSONB))
+
+# Decay scores for many memories in one statement, zipped from two arrays
+_BULK_UPDATE_WEIGHTS_SQL = text("""
+    UPDATE memories
+    SET decay_score = data.weight
+    FROM (
+        SELECT unnest(CAST(:memory_ids AS uuid[])) AS memory_id,
+               unnest(CAST(:weights AS float8[])) AS weight
+    ) AS data
+    WHERE memories.memory_id = data.memory_id
+    RETURNING memories.user_id
+""")
+
+# Only the columns the decay calculation needs, never the embedding.
+# Critical memories never decay and nothing decays in its first day,
+# so those rows are skipped in SQL.
+_DECAY_SCAN_SQL = text("""
+    SELECT memory_id, importance_score, importance_level, created_at,
+           access_count, last_accessed, decay_score
+    FROM memories
+    WHERE importance_level IS DISTINCT FROM 'critical'
+      AND created_at < NOW() - INTERVAL '1 day'
+""")
+
+# Columns the update_memory SET clause binds as JSONB
+_JSONB_UPDATE_FIELDS = ("tags", "entities")
+
+_DELETE_MEMORY_SQL = text("DELETE FROM memories WHERE memory_id = :memory_id")
+
+# Per-type counts plus the overall totals (the row with type IS NULL)
+_USER_STATS_SQL = text("""
+    SELECT 
+        type,
+        COUNT(*) as count,
+        COALESCE(AVG(confidence), 0) as avg_confidence,
+        COALESCE(MIN(source_turn), 0) as oldest_turn,
+        COALESCE(MAX(source_turn), 0) as newest_turn,
+        COALESCE(SUM(access_count), 0) as total_accesses,
+        COUNT(*) FILTER (WHERE access_count >= :hot_threshold) as hot_count
+    FROM memories
+    WHERE user_id = :user_id
+    GROUP BY GROUPING SETS ((type), ())
+""")
+
+
+@lru_cache(maxsize=None)
+def _user_memories_sql(filter_type: bool, include_embedding: bool):
+    """Build (once per variant) the statement used by get_user_memories."""
+    type_filter = "AND type = :type" if filter_type else ""
+    return text(f"""
+        SELECT {_memory_columns(include_embedding)}
+        FROM memories
+        WHERE user_id = :user_id {type_filter}
+        ORDER BY created_at DESC LIMIT :limit
+    """)
+
+
+def _compress(payload: bytes) -> bytes:
+    """lz4-compress a cache payload if it is large enough to be worth it."""
+    if len(payload) <= _COMPRESS_MIN_BYTES:
+        return payload
+    return _LZ4_TAG + lz4.frame.compress(payload, compression_level=1)
+
+
+def _decompress(payload: bytes) -> bytes:
+    """Undo ``_compress``; uncompressed payloads pass through untouched."""
+    if payload[:1] == _LZ4_TAG:
+        return lz4.frame.decompress(payload[1:])
+    return payload
+
+
+def _encode_memory(memory: Memory) -> bytes:
+    """Serialize a memory into an uncompressed binary cache payload.
+
+    Layout: version byte, little-endian uint32 length of the JSON body,
+    the JSON body (everything but the embedding), then the embedding as
+    raw float32 bytes. The body is built from plain dicts and encoded with
+    orjson rather than running Pydantic's serializer.
+    """
+    body = orjson.dumps({
+        "memory_id": str(memory.memory_id),
+        "user_id": memory.user_id,
+        "type": memory.type.value,
+        "content": memory.content,
+        "metadata": memory.metadata.model_dump(),
+    })
+    vector = (
+        np.asarray(memory.embedding, dtype=np.float32).tobytes()
+        if memory.embedding is not None
+        else b""
+    )
+    return CACHE_SCHEMA_VERSION + _HEADER_LEN.pack(len(body)) + body + vector
+
+
+def _decode_memory(payload: bytes) -> Optional[Memory]:
+    """Rebuild a memory from a payload produced by ``_encode_memory``.
+
+    Validation is skipped (``model_construct``) because the payload was
+    produced from an already-validated memory.
+
+    Returns None if the payload was written with a different schema version.
+    """
+    if payload[:1] != CACHE_SCHEMA_VERSION:
+        return None
+    offset = 1 + _HEADER_LEN.size
+    (body_len,) = _HEADER_LEN.unpack_from(payload, 1)
+    data = orjson.loads(payload[offset:offset + body_len])
+    vector = payload[offset + body_len:]
+
+    meta = data["metadata"]
+    meta["created_at"] = datetime.fromisoformat(meta["created_at"])
+    meta["last_accessed"] = datetime.fromisoformat(meta["last_accessed"])
+
+    return Memory.model_construct(
+        memory_id=UUID(data["memory_id"]),
+        user_id=data["user_id"],
+        type=MemoryType(data["type"]),
+        content=data["content"],
+        embedding=np.frombuffer(vector, dtype=np.float32).tolist() if vector else None,
+        metadata=MemoryMetadata.model_construct(**meta),
+    )
+
+
+def _pack_memory(memory: Memory) -> bytes:
+    """Serialize a memory for the cache, compressing large payloads."""
+    return _compress(_encode_memory(memory))
+
+
+def _unpack_memory(payload: bytes) -> Optional[Memory]:
+    """Rebuild a memory from a payload produced by ``_pack_memory``."""
+    return _decode_memory(_decompress(payload))
+
+
+def _pack_memories(memories: list[Memory]) -> bytes:
+    """Serialize a list of memories as length-prefixed ``_encode_memory`` payloads.
+
+    The list is compressed as a whole rather than per memory.
+    """
+    parts = [CACHE_SCHEMA_VERSION]
+    for memory in memories:
+        payload = _encode_memory(memory)
+        parts.append(_HEADER_LEN.pack(len(payload)))
+        parts.append(payload)
+    return _compress(b"".join(parts))
+
+
+def _unpack_memories(payload: bytes) -> Optional[list[Memory]]:
+    """Rebuild a list of memories from a payload produced by ``_pack_memories``."""
+    payload = _decompress(payload)
+    if payload[:1] != CACHE_SCHEMA_VERSION:
+        return None
+    memories = []
+    offset = 1
+    while offset < len(payload):
+        (size,) = _HEADER_LEN.unpack_from(payload, offset)
+        offset += _HEADER_LEN.size
+        memory = _decode_memory(payload[offset:offset + size])
+        if memory is None:
+            return None
+        memories.append(memory)
+        offset += size
+    return memories
+
 
 class MemoryStorage:
     """Handle storage and retrieval of memories across multiple backends."""
@@ -54,14 +292,64 @@ class MemoryStorage:
         return f"memory:{str(memory_id)}"
 
     def _user_cache_key(self, user_id: str) -> str:
-        """Generate cache key for user memory list."""
+        """Generate cache key for user memory list.
+
+        The key holds a hash with one field per (type, limit) query so a
+        single DELETE drops every cached list for the user.
+        """
         return f"user_memories:{user_id}"
 
+    @staticmethod
+    def _user_cache_field(
+        memory_type: Optional[MemoryType],
+        limit: int,
+        include_embedding: bool,
+    ) -> str:
+        """Generate hash field for a user memory list query."""
+        kind = memory_type.value if memory_type else "*"
+        return f"{kind}:{limit}:{'e' if include_embedding else '-'}"
+
+    @staticmethod
+    def _row_to_memory(row) -> Memory:
+        """Build a memory from a row mapping selected with ``_memory_columns``."""
+        raw_embedding = row["embedding"]
+        embedding = [float(x) for x in raw_embedding.strip('[]').split(',')] if raw_embedding else None
+
+        # JSONB columns arrive already decoded by the driver's JSON codec
+        tags = row["tags"] or []
+        entities = row["entities"] or []
+
+        metadata = MemoryMetadata(
+            source_turn=row["source_turn"],
+            created_at=row["created_at"],
+            last_accessed=row["last_accessed"] or row["created_at"],
+            access_count=row["access_count"] or 0,
+            confidence=row["confidence"],
+            decay_score=row["decay_score"] or 1.0,
+            tags=tags,
+            entities=entities,
+        )
+        # Note: last_used_turn is selected but not in MemoryMetadata model
+
+        return Memory(
+            memory_id=row["memory_id"],  # asyncpg returns UUID objects already
+            user_id=row["user_id"],
+            type=MemoryType(row["type"]),
+            content=row["content"],
+            embedding=embedding,
+            metadata=metadata,
+        )
+
+    @classmethod
+    def _hydrate_rows(cls, rows) -> list[Memory]:
+        """Build memories from row mappings (pure; safe to run in a worker thread)."""
+        return [cls._row_to_memory(row) for row in rows]
+
     async def _cache_memory(self, memory: Memory) -> None:
         """Cache memory in Redis."""
         try:
             cache_key = self._cache_key(memory.memory_id)
-            cache_value = memory.model_dump_json()
+            cache_value = _pack_memory(memory)
             await self.redis.setex(
                 cache_key,
                 settings.redis_cache_ttl,
@@ -77,20 +365,165 @@ class MemoryStorage:
             cache_key = self._cache_key(memory_id)
             cached = await self.redis.get(cache_key)
             if cached:
-                metrics.record_cache_hit("memory")
-                return Memory.model_validate_json(cached)
+                memory = _unpack_memory(cached)
+                if memory is not None:
+                    metrics.record_cache_hit("memory")
+                    return memory
             metrics.record_cache_miss("memory")
         except Exception as e:
             logger.warning(f"Failed to get cached memory: {e}")
         return None
 
-    async def _invalidate_user_cache(self, user_id: str) -> None:
-        """Invalidate user's memory list cache."""
+    async def _refresh_cache(
+        self,
+        user_id: str,
+        memories: Sequence[Memory] = (),
+        stale_ids: tuple[UUID, ...] = (),
+    ) -> None:
+        """Cache memories and/or drop stale entries in one pipelined round trip.
+
+        Args:
+            user_id: Owner whose memory list cache is invalidated
+            memories: Memories to (re)cache, if any
+            stale_ids: Memory IDs whose cached entries should be dropped
+        """
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for memory in memories:
+                    pipe.setex(
+                        self._cache_key(memory.memory_id),
+                        settings.redis_cache_ttl,
+                        _pack_memory(memory),
+                    )
+                keys = [self._cache_key(memory_id) for memory_id in stale_ids]
+                # UNLINK frees the (possibly large) user list hash off Redis's main thread
+                pipe.unlink(self._user_cache_key(user_id), *keys)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to refresh cache for user {user_id}: {e}")
+
+    async def invalidate_user_cache(self, user_id: str) -> None:
+        """Drop every cached memory list for a user after a write outside this class."""
+        await self._refresh_cache(user_id)
+
+    async def _upsert_vector(self, memory: Memory, is_conflicted: bool) -> None:
+        """Upsert a memory's vector and metadata into Pinecone off the event loop.
+
+        Failures are logged rather than raised so they never undo the
+        PostgreSQL write the upsert accompanies.
+        """
+        await self._upsert_vectors([memory], is_conflicted)
+
+    async def _upsert_vectors(self, memories: Sequence[Memory], is_conflicted: bool) -> None:
+        """Upsert several memories' vectors in one Pinecone request; see _upsert_vector."""
+        try:
+            await asyncio.to_thread(
+                self.pinecone_index.upsert,
+                vectors=[
+                    {
+                        "id": str(memory.memory_id),
+                        "values": memory.embedding,
+                        "metadata": {
+                            "user_id": memory.user_id,
+                            "type": memory.type.value,
+                            "content": memory.content[:1000],  # Pinecone metadata limit
+                            "source_turn": memory.metadata.source_turn,
+                            "confidence": memory.metadata.confidence,
+                            "importance_score": memory.metadata.importance_score,
+                            "importance_level": memory.metadata.importance_level,
+                            "created_at": memory.metadata.created_at.isoformat(),
+                            "access_count": memory.metadata.access_count,
+                            "is_conflicted": is_conflicted,
+                        },
+                    }
+                    for memory in memories
+                ],
+            )
+        except Exception as e:
+            ids = ", ".join(str(memory.memory_id) for memory in memories)
+            logger.warning(f"Failed to upsert memory {ids} to Pinecone: {e}")
+
+    async def _update_vector_metadata(self, memory_id: UUID, fields: dict) -> None:
+        """Patch Pinecone metadata for a memory without re-sending its vector.
+
+        Failures are logged rather than raised, as in ``_upsert_vector``.
+        """
         try:
-            cache_key = self._user_cache_key(user_id)
-            await self.redis.delete(cache_key)
+            await asyncio.to_thread(
+                self.pinecone_index.update,
+                id=str(memory_id),
+                set_metadata=fields,
+            )
         except Exception as e:
-            logger.warning(f"Failed to invalidate user cache: {e}")
+            logger.warning(f"Failed to update Pinecone metadata for {memory_id}: {e}")
+
+    async def _delete_vector(self, memory_id: UUID) -> None:
+        """Delete a memory's vector from Pinecone off the event loop."""
+        await self._delete_vectors([memory_id])
+
+    async def _delete_vectors(self, memory_ids: Sequence[UUID]) -> None:
+        """Delete several memories' vectors in one Pinecone request."""
+        try:
+            await asyncio.to_thread(self.pinecone_index.delete, ids=[str(i) for i in memory_ids])
+        except Exception as e:
+            ids = ", ".join(str(memory_id) for memory_id in memory_ids)
+            logger.warning(f"Failed to delete memory {ids} from Pinecone: {e}")
+
+    @staticmethod
+    def _new_memory(memory_create: MemoryCreate, embedding: list[float], now: datetime) -> Memory:
+        """Build a Memory for a MemoryCreate, weighting it on the way.
+
+        Every field comes from the validated MemoryCreate, the calculator, or
+        the embedder, so validation isn't re-run.
+        """
+        importance_score, importance_level = MemoryWeightCalculator.calculate_initial_weight(
+            memory_type=memory_create.type,
+            content=memory_create.content,
+            confidence=memory_create.confidence,
+            context=memory_create.context
+        )
+
+        metadata = MemoryMetadata.model_construct(
+            source_turn=memory_create.source_turn,
+            created_at=now,
+            last_accessed=now,
+            confidence=memory_create.confidence,
+            importance_score=importance_score,
+            importance_level=importance_level.value,
+            tags=memory_create.tags,
+            entities=memory_create.entities,
+            context=memory_create.context,
+        )
+
+        return Memory.model_construct(
+            memory_id=uuid4(),
+            user_id=memory_create.user_id,
+            type=memory_create.type,
+            content=memory_create.content,
+            embedding=embedding,
+            metadata=metadata,
+        )
+
+    @staticmethod
+    def _insert_params(memory: Memory) -> dict:
+        """Bind parameters for _INSERT_MEMORY_SQL."""
+        metadata = memory.metadata
+        return {
+            "memory_id": str(memory.memory_id),
+            "user_id": memory.user_id,
+            "type": memory.type.value,
+            "content": memory.content,
+            # pgvector accepts the '[x,y,...]' text form
+            "embedding": '[' + ','.join(map(str, memory.embedding)) + ']',
+            "source_turn": metadata.source_turn,
+            "created_at": metadata.created_at,
+            "confidence": metadata.confidence,
+            "importance_score": metadata.importance_score,
+            "importance_level": metadata.importance_level,
+            "tags": metadata.tags,
+            "entities": metadata.entities,
+            "last_used_turn": None,
+        }
 
     @track_time("create_memory")
     async def create_memory(self, memory_create: MemoryCreate) -> Memory:
@@ -107,103 +540,86 @@ class MemoryStorage:
         """
         try:
             # Generate embedding
-            embedding = await self.embedder.generate(memory_create.content)
-
-            # Calculate importance weight
-            from app.utils.memory_weight import MemoryWeightCalculator
-            importance_score, importance_level = MemoryWeightCalculator.calculate_initial_weight(
-                memory_type=memory_create.type.value,
-                content=memory_create.content,
-                confidence=memory_create.confidence,
-                context=memory_create.context
-            )
+            embedding = await self.embedder.generate_coalesced(memory_create.content)
 
-            # Create memory object
-            metadata = MemoryMetadata(
-                source_turn=memory_create.source_turn,
-                confidence=memory_create.confidence,
-                importance_score=importance_score,
-                importance_level=importance_level.value,
-                tags=memory_create.tags,
-                entities=memory_create.entities,
-                context=memory_create.context,
-            )
+            memory = self._new_memory(memory_create, embedding, datetime.utcnow())
+            insert = self.session.execute(_INSERT_MEMORY_SQL, self._insert_params(memory))
 
-            memory = Memory(
-                user_id=memory_create.user_id,
-                type=memory_create.type,
-                content=memory_create.content,
-                embedding=embedding,
-                metadata=metadata,
+            # Write PostgreSQL and Pinecone concurrently; a Pinecone failure is
+            # logged by _upsert_vector and does not fail the insert
+            insert_result, _ = await asyncio.gather(
+                insert,
+                self._upsert_vector(memory, is_conflicted=False),  # New memories not conflicted
+                return_exceptions=True,
             )
+            if isinstance(insert_result, BaseException):
+                # Don't leave an orphaned vector behind for a memory that was never stored
+                await self._delete_vector(memory.memory_id)
+                raise insert_result
 
-            # Store in PostgreSQL with pgvector
-            # Convert embedding list to string format for pgvector
-            embedding_str = '[' + ','.join(map(str, embedding)) + ']'
+            # Cache the memory and invalidate the user's lists together
+            await self._refresh_cache(memory.user_id, memories=(memory,))
+
+            logger.info(f"Created memory {memory.memory_id} for user {memory.user_id}")
+            return memory
+
+        except Exception as e:
+            logger.error(f"Failed to create memory: {e}")
+            raise
+
+    @track_time("bulk_create_memories")
+    async def bulk_create_memories(self, memory_creates: list[MemoryCreate]) -> list[Memory]:
+        """Create several memories with one embedding batch and one INSERT.
+        
+        Args:
+            memory_creates: Memory creation data
             
-            query = """
-                INSERT INTO memories (
-                    memory_id, user_id, type, content, embedding,
-                    source_turn, created_at, confidence, importance_score, importance_level,
-                    tags, entities, last_used_turn
-                ) VALUES (
-                    :memory_id, :user_id, :type, :content, :embedding,
-                    :source_turn, :created_at, :confidence, :importance_score, :importance_level,
-                    :tags, :entities, :last_used_turn
-                )
-            """
+        Returns:
+            Created memories, in input order
             
-            from sqlalchemy import text
-            await self.session.execute(
-                text(query),
-                {
-                    "memory_id": str(memory.memory_id),
-                    "user_id": memory.user_id,
-                    "type": memory.type.value,
-                    "content": memory.content,
-                    "embedding": embedding_str,
-                    "source_turn": metadata.source_turn,
-                    "created_at": metadata.created_at,
-                    "confidence": metadata.confidence,
-                    "importance_score": metadata.importance_score,
-                    "importance_level": metadata.importance_level,
-                    "tags": json.dumps(metadata.tags),
-                    "entities": json.dumps(metadata.entities),
-                    "last_used_turn": None,
-                },
-            )
+        Raises:
+            Exception: If creation fails
+        """
+        if not memory_creates:
+            return []
 
-            # Store in Pinecone for vector search
-            self.pinecone_index.upsert(
-                vectors=[
-                    {
-                        "id": str(memory.memory_id),
-                        "values": embedding,
-                        "metadata": {
-                            "user_id": memory.user_id,
-                            "type": memory.type.value,
-                            "content": memory.content[:1000],  # Pinecone metadata limit
-                            "source_turn": metadata.source_turn,
-                            "confidence": metadata.confidence,
-                            "importance_score": metadata.importance_score,
-                            "importance_level": metadata.importance_level,
-                            "created_at": metadata.created_at.isoformat(),
-                            "access_count": metadata.access_count,
-                            "is_conflicted": False,  # New memories not conflicted
-                        },
-                    }
-                ]
+        try:
+            # Embed every memory in one batched pass
+            start = time.monotonic()
+            embeddings = await self.embedder.generate_batch([m.content for m in memory_creates])
+            metrics.record_embedding_time(time.monotonic() - start, len(memory_creates))
+
+            now = datetime.utcnow()
+            memories = [
+                self._new_memory(memory_create, embedding, now)
+                for memory_create, embedding in zip(memory_creates, embeddings)
+            ]
+
+            # One executemany INSERT alongside one Pinecone upsert
+            insert = self.session.execute(
+                _INSERT_MEMORY_SQL, [self._insert_params(memory) for memory in memories]
+            )
+            insert_result, _ = await asyncio.gather(
+                insert,
+                self._upsert_vectors(memories, is_conflicted=False),
+                return_exceptions=True,
             )
+            if isinstance(insert_result, BaseException):
+                await self._delete_vectors([memory.memory_id for memory in memories])
+                raise insert_result
 
-            # Cache the memory
-            await self._cache_memory(memory)
-            await self._invalidate_user_cache(memory.user_id)
+            # Cache the memories and invalidate each owner's lists together
+            by_user: dict[str, list[Memory]] = {}
+            for memory in memories:
+                by_user.setdefault(memory.user_id, []).append(memory)
+            for user_id, user_memories in by_user.items():
+                await self._refresh_cache(user_id, memories=user_memories)
 
-            logger.info(f"Created memory {memory.memory_id} for user {memory.user_id}")
-            return memory
+            logger.info(f"Created {len(memories)} memories")
+            return memories
 
         except Exception as e:
-            logger.error(f"Failed to create memory: {e}")
+            logger.error(f"Failed to bulk create memories: {e}")
             raise
 
     @track_time("get_memory")
@@ -223,44 +639,15 @@ class MemoryStorage:
 
         try:
             # Query from database
-            query = text("""
-                SELECT 
-                    memory_id, user_id, type, content, embedding::text,
-                    source_turn, created_at, last_accessed, access_count,
-                    confidence, decay_score, tags, entities, last_used_turn
-                FROM memories
-                WHERE memory_id = :memory_id
-            """)
-            
-            result = await self.session.execute(query, {"memory_id": str(memory_id)})
-            row = result.fetchone()
+            result = await self.session.execute(
+                _GET_MEMORY_SQL, {"memory_id": str(memory_id)}
+            )
+            row = result.mappings().first()
 
             if not row:
                 return None
 
-            # Reconstruct memory object
-            embedding = [float(x) for x in row[4].strip('[]').split(',')]
-            
-            metadata = MemoryMetadata(
-                source_turn=row[5],
-                created_at=row[6],
-                last_accessed=row[7] or row[6],
-                access_count=row[8] or 0,
-                confidence=row[9],
-                decay_score=row[10] or 1.0,
-                tags=json.loads(row[11]) if row[11] else [],
-                entities=json.loads(row[12]) if row[12] else [],
-            )
-            # Note: last_used_turn is row[13] but not in MemoryMetadata model
-
-            memory = Memory(
-                memory_id=row[0],  # asyncpg returns UUID objects already
-                user_id=row[1],
-                type=MemoryType(row[2]),
-                content=row[3],
-                embedding=embedding,
-                metadata=metadata,
-            )
+            memory = self._row_to_memory(row)
 
             # Cache it
             await self._cache_memory(memory)
@@ -271,6 +658,59 @@ class MemoryStorage:
             logger.error(f"Failed to get memory {memory_id}: {e}")
             return None
 
+    async def get_memories(self, memory_ids: list[UUID]) -> list[Memory]:
+        """Retrieve several memories by ID, preserving the requested order.
+        
+        Cached memories are fetched with a single MGET; only the misses are
+        loaded from PostgreSQL (in one query) and written back to the cache.
+        
+        Args:
+            memory_ids: Memory UUIDs
+            
+        Returns:
+            Memories that were found, in the order requested
+        """
+        if not memory_ids:
+            return []
+
+        found: dict[UUID, Memory] = {}
+        try:
+            cached = await self.redis.mget([self._cache_key(i) for i in memory_ids])
+        except Exception as e:
+            logger.warning(f"Failed to get cached memories: {e}")
+            cached = [None] * len(memory_ids)
+
+        for memory_id, payload in zip(memory_ids, cached):
+            memory = _unpack_memory(payload) if payload else None
+            if memory is not None:
+                found[memory_id] = memory
+                metrics.record_cache_hit("memory")
+            else:
+                metrics.record_cache_miss("memory")
+
+        missing = [str(i) for i in memory_ids if i not in found]
+        if missing:
+            result = await self.session.execute(_GET_MEMORIES_SQL, {"memory_ids": missing})
+            loaded = [self._row_to_memory(row) for row in result.mappings()]
+
+            if loaded:
+                try:
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for memory in loaded:
+                            pipe.setex(
+                                self._cache_key(memory.memory_id),
+                                settings.redis_cache_ttl,
+                                _pack_memory(memory),
+                            )
+                        await pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Failed to cache memories: {e}")
+
+            for memory in loaded:
+                found[memory.memory_id] = memory
+
+        return [found[i] for i in memory_ids if i in found]
+
     @track_time("update_memory")
     async def update_memory(
         self,
@@ -296,7 +736,7 @@ class MemoryStorage:
             if memory_update.content is not None:
                 memory.content = memory_update.content
                 # Regenerate embedding
-                memory.embedding = await self.embedder.generate(memory_update.content)
+                memory.embedding = await self.embedder.generate_coalesced(memory_update.content)
                 update_fields["content"] = memory.content
                 update_fields["embedding"] = str(memory.embedding)
 
@@ -306,11 +746,11 @@ class MemoryStorage:
 
             if memory_update.tags is not None:
                 memory.metadata.tags = memory_update.tags
-                update_fields["tags"] = json.dumps(memory_update.tags)
+                update_fields["tags"] = memory_update.tags
 
             if memory_update.entities is not None:
                 memory.metadata.entities = memory_update.entities
-                update_fields["entities"] = json.dumps(memory_update.entities)
+                update_fields["entities"] = memory_update.entities
 
             if not update_fields:
                 return memory
@@ -321,37 +761,30 @@ class MemoryStorage:
                 UPDATE memories
                 SET {set_clause}
                 WHERE memory_id = :memory_id
-            """)
+            """).bindparams(
+                *[bindparam(k, type_=JSONB) for k in _JSONB_UPDATE_FIELDS if k in update_fields]
+            )
             
             params = {**update_fields, "memory_id": str(memory_id)}
+
+            # PostgreSQL first: Pinecone is only touched once the UPDATE has
+            # succeeded, so a failed write can't leave the stores diverged
             await self.session.execute(query, params)
 
-            # Update in Pinecone if embedding changed
             if "embedding" in update_fields:
-                self.pinecone_index.upsert(
-                    vectors=[
-                        {
-                            "id": str(memory.memory_id),
-                            "values": memory.embedding,
-                            "metadata": {
-                                "user_id": memory.user_id,
-                                "type": memory.type.value,
-                                "content": memory.content[:1000],
-                                "source_turn": memory.metadata.source_turn,
-                                "confidence": memory.metadata.confidence,
-                                "importance_score": memory.metadata.importance_score,
-                                "importance_level": memory.metadata.importance_level,
-                                "created_at": memory.metadata.created_at.isoformat(),
-                                "access_count": memory.metadata.access_count,
-                                "is_conflicted": False,  # Could be updated by conflict resolver
-                            },
-                        }
-                    ]
+                # Content changed: re-upsert vector and metadata
+                await self._upsert_vector(
+                    memory,
+                    is_conflicted=False,  # Could be updated by conflict resolver
+                )
+            elif "confidence" in update_fields:
+                # Only mirrored metadata changed: patch it, leaving vector and content alone
+                await self._update_vector_metadata(
+                    memory_id, {"confidence": memory.metadata.confidence}
                 )
 
             # Invalidate cache
-            await self.redis.delete(self._cache_key(memory_id))
-            await self._invalidate_user_cache(memory.user_id)
+            await self._refresh_cache(memory.user_id, stale_ids=(memory_id,))
 
             logger.info(f"Updated memory {memory_id}")
             return memory
@@ -377,24 +810,19 @@ class MemoryStorage:
             True if updated
         """
         try:
-            query = text("""
-                UPDATE memories
-                SET importance_score = :importance_score,
-                    importance_level = :importance_level
-                WHERE memory_id = :memory_id
-            """)
-            
-            await self.session.execute(
-                query,
+            result = await self.session.execute(
+                _UPDATE_IMPORTANCE_SQL,
                 {
                     "memory_id": str(memory_id),
                     "importance_score": new_importance,
                     "importance_level": importance_level
                 }
             )
+            user_id = result.scalar_one_or_none()
             
             # Invalidate cache
-            await self.redis.delete(self._cache_key(memory_id))
+            if user_id is not None:
+                await self._refresh_cache(user_id, stale_ids=(memory_id,))
             
             logger.info(f"Updated importance for memory {memory_id}: {new_importance}")
             return True
@@ -403,6 +831,63 @@ class MemoryStorage:
             logger.error(f"Failed to update importance for {memory_id}: {e}")
             return False
     
+    async def bulk_update_memory_weights(
+        self,
+        updates: list[tuple[UUID, float]]
+    ) -> int:
+        """Update the decay score of many memories in a single statement.
+        
+        Args:
+            updates: (memory_id, weight) pairs
+            
+        Returns:
+            Number of rows updated
+        """
+        if not updates:
+            return 0
+        
+        memory_ids = [str(memory_id) for memory_id, _ in updates]
+        try:
+            result = await self.session.execute(
+                _BULK_UPDATE_WEIGHTS_SQL,
+                {
+                    "memory_ids": memory_ids,
+                    "weights": [float(weight) for _, weight in updates]
+                }
+            )
+            user_ids = result.scalars().all()
+            
+            # Invalidate cache: the memories themselves and their owners' lists
+            try:
+                await self.redis.unlink(
+                    *(self._cache_key(memory_id) for memory_id, _ in updates),
+                    *(self._user_cache_key(user_id) for user_id in set(user_ids)),
+                )
+            except Exception as e:
+                logger.warning(f"Failed to invalidate cache after weight update: {e}")
+            
+            logger.info(f"Updated decay scores for {len(user_ids)} memories")
+            return len(user_ids)
+        
+        except Exception as e:
+            logger.error(f"Failed to bulk update memory weights: {e}")
+            raise
+    
+    async def stream_decay_rows(self, batch_size: int = 500) -> AsyncIterator[list]:
+        """Stream the decay inputs of every memory through a server-side cursor.
+        
+        Args:
+            batch_size: Rows fetched per round-trip and yielded per batch
+            
+        Yields:
+            Lists of row mappings with the _DECAY_SCAN_SQL columns
+        """
+        result = await self.session.stream(
+            _DECAY_SCAN_SQL.execution_options(yield_per=batch_size)
+        )
+        async for partition in result.mappings().partitions(batch_size):
+            yield partition
+    
     async def update_memory_context(
         self,
         memory_id: UUID,
@@ -418,22 +903,18 @@ class MemoryStorage:
             True if updated
         """
         try:
-            query = text("""
-                UPDATE memories
-                SET context = :context
-                WHERE memory_id = :memory_id
-            """)
-            
-            await self.session.execute(
-                query,
+            result = await self.session.execute(
+                _UPDATE_CONTEXT_SQL,
                 {
                     "memory_id": str(memory_id),
-                    "context": json.dumps(context)
+                    "context": context
                 }
             )
+            user_id = result.scalar_one_or_none()
             
             # Invalidate cache
-            await self.redis.delete(self._cache_key(memory_id))
+            if user_id is not None:
+                await self._refresh_cache(user_id, stale_ids=(memory_id,))
             
             logger.info(f"Updated context for memory {memory_id}")
             return True
@@ -458,15 +939,13 @@ class MemoryStorage:
 
         try:
             # Delete from PostgreSQL
-            query = text("DELETE FROM memories WHERE memory_id = :memory_id")
-            await self.session.execute(query, {"memory_id": str(memory_id)})
+            await self.session.execute(_DELETE_MEMORY_SQL, {"memory_id": str(memory_id)})
 
             # Delete from Pinecone
-            self.pinecone_index.delete(ids=[str(memory_id)])
+            await self._delete_vector(memory_id)
 
             # Remove from cache
-            await self.redis.delete(self._cache_key(memory_id))
-            await self._invalidate_user_cache(memory.user_id)
+            await self._refresh_cache(memory.user_id, stale_ids=(memory_id,))
 
             logger.info(f"Deleted memory {memory_id}")
             return True
@@ -481,6 +960,7 @@ class MemoryStorage:
         user_id: str,
         memory_type: Optional[MemoryType] = None,
         limit: int = 100,
+        include_embedding: bool = False,
     ) -> list[Memory]:
         """Get all memories for a user.
         
@@ -488,61 +968,47 @@ class MemoryStorage:
             user_id: User ID
             memory_type: Optional filter by type
             limit: Maximum number of memories to return
+            include_embedding: Load embedding vectors; when False (the default)
+                returned memories have ``embedding=None``
             
         Returns:
             List of memories
         """
+        cache_key = self._user_cache_key(user_id)
+        cache_field = self._user_cache_field(memory_type, limit, include_embedding)
         try:
-            query_str = """
-                SELECT 
-                    memory_id, user_id, type, content, embedding::text,
-                    source_turn, created_at, last_accessed, access_count,
-                    confidence, decay_score, tags, entities, last_used_turn
-                FROM memories
-                WHERE user_id = :user_id
-            """
-            
-            params = {"user_id": user_id}
-            
+            cached = await self.redis.hget(cache_key, cache_field)
+            if cached:
+                memories = _unpack_memories(cached)
+                if memories is not None:
+                    metrics.record_cache_hit("user_memories")
+                    return memories
+            metrics.record_cache_miss("user_memories")
+        except Exception as e:
+            logger.warning(f"Failed to get cached user memories: {e}")
+
+        try:
+            params = {"user_id": user_id, "limit": limit}
             if memory_type:
-                query_str += " AND type = :type"
                 params["type"] = memory_type.value
 
-            query_str += " ORDER BY created_at DESC LIMIT :limit"
-            params["limit"] = limit
-
-            query = text(query_str)
+            query = _user_memories_sql(memory_type is not None, include_embedding)
             result = await self.session.execute(query, params)
-            rows = result.fetchall()
-
-            memories = []
-            for row in rows:
-                embedding = [float(x) for x in row[4].strip('[]').split(',')]
-                
-                # PostgreSQL JSONB columns are already deserialized by asyncpg
-                tags = row[11] if isinstance(row[11], list) else (json.loads(row[11]) if row[11] else [])
-                entities = row[12] if isinstance(row[12], list) else (json.loads(row[12]) if row[12] else [])
-                
-                metadata = MemoryMetadata(
-                    source_turn=row[5],
-                    created_at=row[6],
-                    last_accessed=row[7] or row[6],
-                    access_count=row[8] or 0,
-                    confidence=row[9],
-                    decay_score=row[10] or 1.0,
-                    tags=tags,
-                    entities=entities,
-                )
+            rows = result.mappings().all()
 
-                memory = Memory(
-                    memory_id=row[0],  # asyncpg returns UUID objects already
-                    user_id=row[1],
-                    type=MemoryType(row[2]),
-                    content=row[3],
-                    embedding=embedding,
-                    metadata=metadata,
-                )
-                memories.append(memory)
+            # Parsing hundreds of embedding strings would stall the event loop
+            if include_embedding and len(rows) >= _THREADED_HYDRATE_MIN_ROWS:
+                memories = await asyncio.to_thread(self._hydrate_rows, rows)
+            else:
+                memories = self._hydrate_rows(rows)
+
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.hset(cache_key, cache_field, _pack_memories(memories))
+                    pipe.expire(cache_key, settings.redis_cache_ttl)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Failed to cache user memories: {e}")
 
             return memories
 
@@ -560,58 +1026,32 @@ class MemoryStorage:
             Memory statistics
         """
         try:
-            # Get counts by type
-            query = text("""
-                SELECT 
-                    type,
-                    COUNT(*) as count,
-                    COALESCE(AVG(confidence), 0) as avg_confidence,
-                    MIN(source_turn) as oldest_turn,
-                    MAX(source_turn) as newest_turn,
-                    COALESCE(SUM(access_count), 0) as total_accesses,
-                    COALESCE(SUM(CASE WHEN access_count >= :hot_threshold THEN 1 ELSE 0 END), 0) as hot_count
-                FROM memories
-                WHERE user_id = :user_id
-                GROUP BY type
-            """)
-            
             result = await self.session.execute(
-                query,
+                _USER_STATS_SQL,
                 {"user_id": user_id, "hot_threshold": 10},  # Consider memories accessed 10+ times as "hot"
             )
-            rows = result.fetchall()
-
-            total_memories = 0
             memories_by_type = {}
-            total_confidence = 0.0
-            oldest_turn = float('inf')
-            newest_turn = 0
-            total_accesses = 0
-            hot_memories = 0
-
-            for row in rows:
-                mem_type = MemoryType(row[0])
-                count = row[1]
+            totals = None
+
+            for row in result.mappings():
+                if row["type"] is None:
+                    totals = row
+                    continue
                 # Store directly as string value, not enum
-                memories_by_type[mem_type.value] = count  # mem_type.value gives "FACT", "PREFERENCE", etc
-                total_memories += count
-                total_confidence += (row[2] or 0.0) * count
-                oldest_turn = min(oldest_turn, row[3] or oldest_turn)
-                newest_turn = max(newest_turn, row[4] or newest_turn)
-                total_accesses += row[5] or 0
-                hot_memories += row[6] or 0
+                memories_by_type[MemoryType(row["type"]).value] = row["count"]
 
-            avg_confidence = total_confidence / total_memories if total_memories > 0 else 0.0
+            # The empty grouping set always yields a totals row; guard anyway
+            total_memories = totals["count"] if totals else 0
 
             stats = MemoryStats(
                 user_id=user_id,
                 total_memories=total_memories,
                 memories_by_type=memories_by_type,  # Already strings now
-                avg_confidence=float(avg_confidence),
-                oldest_memory_turn=int(oldest_turn if oldest_turn != float('inf') else 0),
-                newest_memory_turn=int(newest_turn),
-                total_access_count=int(total_accesses),
-                hot_memories=int(hot_memories),
+                avg_confidence=float(totals["avg_confidence"]) if totals else 0.0,
+                oldest_memory_turn=int(totals["oldest_turn"]) if totals else 0,
+                newest_memory_turn=int(totals["newest_turn"]) if totals else 0,
+                total_access_count=int(totals["total_accesses"]) if totals else 0,
+                hot_memories=int(totals["hot_count"]) if totals else 0,
             )
             
             logger.info(f"📊 Generated stats for {user_id}: total={total_memories}, types={list(memories_by_type.keys())}")
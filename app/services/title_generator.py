@@ -1,16 +1,72 @@
 """Service for automatically generating conversation titles."""
 
+import asyncio
+import hashlib
 import logging
+import re
+from functools import lru_cache
 from typing import Optional
 
+from redis import asyncio as aioredis
+
 from app.llm_client import get_llm_client
 
 logger = logging.getLogger(__name__)
 
+# Generated titles are cached in Redis for a week
+TITLE_CACHE_TTL = 7 * 24 * 3600
+
+# Questions like "How do I X?" already read as a title, no LLM needed
+_QUICK_TITLE = re.compile(r"^(how (?:do|can) i|what is|help with)\s+(.+?)\??$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=10_000)
+def _llm_title(first_message: str) -> str:
+    """Ask the LLM for a title. Cached per message; failures raise and aren't cached."""
+    messages = [
+        {
+            "role": "system",
+            "content": """Generate a very short, concise title (max 6 words) for this conversation.
+The title should capture the main topic or intent.
+Return ONLY the title, no quotes, no explanations."""
+        },
+        {
+            "role": "user", 
+            "content": f"First message: {first_message}"
+        }
+    ]
+    
+    title = get_llm_client().chat_completion(
+        messages=messages,
+        temperature=0.3,
+        max_tokens=20,
+    )
+    
+    # Clean up the title
+    return title.strip().strip('"').strip("'")
+
 
 class TitleGenerator:
     """Generate conversation titles from first message."""
 
+    @staticmethod
+    def _quick_title(first_message: str) -> Optional[str]:
+        """Return a title that needs no LLM call, or None if the LLM is needed."""
+        # Keep it simple - just use the first message or generate a short title
+        if len(first_message) <= 50:
+            return first_message
+        
+        # Common question openers already make a good title
+        if _QUICK_TITLE.match(first_message.strip()):
+            return first_message[:47] + "..."
+        
+        return None
+
+    @staticmethod
+    def _fallback_title(first_message: str) -> str:
+        """Truncated first message, used when the LLM gives no title."""
+        return first_message[:50] + ("..." if len(first_message) > 50 else "")
+
     @staticmethod
     def generate_title(first_message: str) -> str:
         """Generate a concise title from the first message.
@@ -22,32 +78,12 @@ class TitleGenerator:
             Generated title (max 50 chars)
         """
         try:
-            # Keep it simple - just use the first message or generate a short title
-            if len(first_message) <= 50:
-                return first_message
+            quick_title = TitleGenerator._quick_title(first_message)
+            if quick_title is not None:
+                return quick_title
             
             # Use LLM to generate a concise title
-            messages = [
-                {
-                    "role": "system",
-                    "content": """Generate a very short, concise title (max 6 words) for this conversation.
-The title should capture the main topic or intent.
-Return ONLY the title, no quotes, no explanations."""
-                },
-                {
-                    "role": "user", 
-                    "content": f"First message: {first_message}"
-                }
-            ]
-            
-            title = get_llm_client().chat_completion(
-                messages=messages,
-                temperature=0.3,
-                max_tokens=20,
-            )
-            
-            # Clean up the title
-            title = title.strip().strip('"').strip("'")
+            title = _llm_title(first_message)
             
             # Truncate if too long
             if len(title) > 50:
@@ -58,7 +94,63 @@ Return ONLY the title, no quotes, no explanations."""
         except Exception as e:
             logger.error(f"Failed to generate title: {e}")
             # Fallback to truncated first message
-            return first_message[:50] + ("..." if len(first_message) > 50 else "")
+            return TitleGenerator._fallback_title(first_message)
+
+    @classmethod
+    async def generate_title_cached(
+        cls,
+        first_message: str,
+        redis_client: Optional[aioredis.Redis] = None,
+    ) -> str:
+        """Generate a title, consulting the shared Redis title cache first.
+        
+        Only LLM titles go through the cache: quick titles cost less than a
+        Redis round trip, and a fallback title from a failed LLM call must
+        not be pinned for the whole cache TTL. The LLM call runs in a worker
+        thread so it doesn't block the event loop.
+        
+        Args:
+            first_message: The first user message in the conversation
+            redis_client: Optional Redis client for the title cache
+            
+        Returns:
+            Generated title (max 50 chars)
+        """
+        if redis_client is None:
+            return await asyncio.to_thread(cls.generate_title, first_message)
+
+        quick_title = cls._quick_title(first_message)
+        if quick_title is not None:
+            return quick_title
+
+        digest = hashlib.sha1(first_message[:256].encode()).hexdigest()
+        cache_key = f"title:{digest}"
+        try:
+            cached = await redis_client.get(cache_key)
+            if cached:
+                return cached.decode() if isinstance(cached, bytes) else cached
+        except Exception as e:
+            logger.warning(f"Title cache read error: {e}")
+
+        try:
+            title = await asyncio.to_thread(_llm_title, first_message)
+        except Exception as e:
+            logger.error(f"Failed to generate title: {e}")
+            return cls._fallback_title(first_message)
+
+        if not title:
+            return first_message[:50]
+
+        # Truncate if too long
+        if len(title) > 50:
+            title = title[:47] + "..."
+
+        try:
+            await redis_client.setex(cache_key, TITLE_CACHE_TTL, title)
+        except Exception as e:
+            logger.warning(f"Title cache write error: {e}")
+
+        return title
 
 
 title_generator = TitleGenerator()
@@ -1,16 +1,33 @@
 """Vision model service for image analysis and document processing using Groq."""
 
-import base64
+import asyncio
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache, wraps
 from io import BytesIO
-from typing import Optional
+from typing import Callable, Iterable, Optional
 
-from PIL import Image
+import numpy as np
+from PIL import Image, JpegImagePlugin
 
 from app.config import get_settings
 from app.llm_client import get_llm_client
 
+# SIMD base64 encoder, falling back to the stdlib one
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 # Optional document processing imports
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
 try:
     import PyPDF2
     PDF_AVAILABLE = True
@@ -19,6 +36,8 @@ except ImportError:
 
 try:
     import docx
+    from docx.oxml.ns import qn
+    from docx.text.paragraph import Paragraph
     DOCX_AVAILABLE = True
 except ImportError:
     DOCX_AVAILABLE = False
@@ -32,6 +51,95 @@ except ImportError:
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Leading-byte signatures of the image formats the vision model accepts
+_IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+)
+
+
+def _sniff_image_format(file_bytes: bytes) -> Optional[str]:
+    """Identify an image format from its first bytes, without decoding it."""
+    if file_bytes[:4] == b'RIFF' and file_bytes[8:12] == b'WEBP':
+        return 'WEBP'
+    for signature, image_format in _IMAGE_SIGNATURES:
+        if file_bytes.startswith(signature):
+            return image_format
+    return None
+
+
+# Already-compact JPEGs up to this size are sent to the vision model as uploaded
+_PASSTHROUGH_MAX_BYTES = 1024 * 1024
+
+# Number of processed images / extracted documents kept in memory
+PROCESSED_CACHE_SIZE = 128
+
+# Characters of extracted document text included in the analysis prompt
+DOCUMENT_PROMPT_CHARS = 4000
+
+
+def _flatten_alpha(img: Image.Image) -> Image.Image:
+    """Composite an RGBA image onto a white background as vectorized NumPy math."""
+    arr = np.asarray(img, dtype=np.uint8)
+    rgb = arr[..., :3].astype(np.uint16)
+    alpha = arr[..., 3:4].astype(np.uint16)
+    # Background term 255 * (255 - a), plus 127 to round, on the alpha plane only
+    background = 255 - alpha
+    background *= 255
+    background += 127
+    # In place, so the only full-size temporary is the uint16 copy of rgb;
+    # rgb * a + 255 * (255 - a) peaks at 255 * 255, so uint16 can't overflow
+    rgb *= alpha
+    rgb += background
+    rgb //= 255
+    return Image.fromarray(rgb.astype(np.uint8), 'RGB')
+
+
+def _take_until(texts: Iterable[str], max_chars: Optional[int]) -> list[str]:
+    """Collect texts until their combined length reaches max_chars (None = all)."""
+    parts = []
+    total = 0
+    for text in texts:
+        parts.append(text)
+        total += len(text)
+        if max_chars is not None and total >= max_chars:
+            break
+    return parts
+
+
+def _content_cached(method: Callable[..., str]) -> Callable[..., str]:
+    """Cache a file-processing method's result by a hash of the file bytes.
+
+    Re-uploads of the same file skip decoding and re-encoding entirely.
+    Extra arguments (e.g. ``max_chars``) are part of the key.
+    Failures raise and aren't cached.
+    """
+    @wraps(method)
+    def wrapper(self: "VisionService", file_bytes: bytes, *args, **kwargs) -> str:
+        key = (
+            method.__name__,
+            hashlib.blake2b(file_bytes, digest_size=16).digest(),
+            args,
+            tuple(sorted(kwargs.items())),
+        )
+        with self._cache_lock:
+            cached = self._processed_cache.get(key)
+            if cached is not None:
+                self._processed_cache.move_to_end(key)
+                return cached
+
+        result = method(self, file_bytes, *args, **kwargs)
+
+        with self._cache_lock:
+            self._processed_cache[key] = result
+            if len(self._processed_cache) > PROCESSED_CACHE_SIZE:
+                self._processed_cache.popitem(last=False)
+        return result
+
+    return wrapper
+
 
 class VisionService:
     """Service for analyzing images with Groq Vision model."""
@@ -41,14 +149,26 @@ class VisionService:
         self.llm_client = get_llm_client()
         self.max_image_size = (1024, 1024)  # Max dimensions
         self.max_file_size = 5 * 1024 * 1024  # 5MB
+        self._processed_cache: OrderedDict[tuple[str, bytes], str] = OrderedDict()
+        self._cache_lock = threading.Lock()
         
-    def validate_image(self, file_bytes: bytes, filename: str) -> tuple[bool, Optional[str]]:
+    def validate_image(
+        self,
+        file_bytes: bytes,
+        filename: str,
+        deep: bool = False,
+    ) -> tuple[bool, Optional[str]]:
         """
         Validate image file.
         
+        The format is identified from the file signature; the full decoder
+        check only runs when ``deep`` is set, since process_image decodes the
+        image anyway.
+        
         Args:
             file_bytes: Image file bytes
             filename: Original filename
+            deep: Also run PIL's integrity check over the whole file
             
         Returns:
             (is_valid, error_message)
@@ -57,22 +177,24 @@ class VisionService:
         if len(file_bytes) > self.max_file_size:
             return False, f"Image too large. Maximum size is {self.max_file_size // (1024*1024)}MB"
         
+        # Check format
+        if _sniff_image_format(file_bytes) is None:
+            return False, "Unsupported format. Use PNG, JPEG, WEBP, or GIF"
+        
+        if not deep:
+            return True, None
+        
         # Check if it's a valid image
         try:
             img = Image.open(BytesIO(file_bytes))
             img.verify()
-            
-            # Check format
-            valid_formats = {'PNG', 'JPEG', 'JPG', 'WEBP', 'GIF'}
-            if img.format not in valid_formats:
-                return False, f"Unsupported format: {img.format}. Use PNG, JPEG, WEBP, or GIF"
-            
             return True, None
             
         except Exception as e:
             logger.error(f"Image validation failed: {e}")
             return False, f"Invalid image file: {str(e)}"
     
+    @_content_cached
     def process_image(self, file_bytes: bytes) -> str:
         """
         Process and optimize image for vision model.
@@ -86,14 +208,34 @@ class VisionService:
         try:
             # Open image
             img = Image.open(BytesIO(file_bytes))
-            
+
+            # A small RGB 4:2:0 JPEG that already fits needs no decode/re-encode,
+            # which would only cost CPU and lose quality. Files carrying EXIF or
+            # XMP (which may hold GPS location) are always re-encoded so that
+            # metadata never reaches the vision API
+            if (
+                img.format == 'JPEG'
+                and 'exif' not in img.info
+                and 'xmp' not in img.info
+                and img.mode == 'RGB'
+                and img.size[0] <= self.max_image_size[0]
+                and img.size[1] <= self.max_image_size[1]
+                and len(file_bytes) <= _PASSTHROUGH_MAX_BYTES
+                and JpegImagePlugin.get_sampling(img) == 2
+            ):
+                logger.info(f"Passing through JPEG {img.size} unchanged")
+                return base64.b64encode(file_bytes).decode('utf-8')
+
+            # Let libjpeg decode large JPEGs at a reduced scale (1/2, 1/4, 1/8)
+            # instead of decoding every pixel only to downsample afterwards
+            if img.format == 'JPEG':
+                img.draft('RGB', self.max_image_size)
+
             # Convert to RGB if needed (e.g., PNG with transparency)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
+            if img.mode == 'P':
+                img = img.convert('RGBA')
+            if img.mode == 'RGBA':
+                img = _flatten_alpha(img)
             elif img.mode != 'RGB':
                 img = img.convert('RGB')
             
@@ -102,9 +244,10 @@ class VisionService:
                 img.thumbnail(self.max_image_size, Image.Resampling.LANCZOS)
                 logger.info(f"Resized image to {img.size}")
             
-            # Convert to JPEG for optimal size
+            # Convert to JPEG for optimal size; progressive scans with optimized
+            # Huffman tables shrink the payload uploaded to the vision API
             buffer = BytesIO()
-            img.save(buffer, format='JPEG', quality=85, optimize=True)
+            img.save(buffer, format='JPEG', quality=85, optimize=True, progressive=True)
             img_bytes = buffer.getvalue()
             
             # Encode to base64
@@ -117,6 +260,11 @@ class VisionService:
             logger.error(f"Image processing failed: {e}", exc_info=True)
             raise ValueError(f"Failed to process image: {str(e)}")
     
+    async def process_image_async(self, file_bytes: bytes) -> str:
+        """Run ``process_image`` in a worker thread so decoding and encoding
+        don't block the event loop (Pillow releases the GIL while it works)."""
+        return await asyncio.to_thread(self.process_image, file_bytes)
+    
     async def analyze_image(
         self,
         image_base64: str,
@@ -185,49 +333,87 @@ class VisionService:
                 "error": str(e)
             }
     
-    def extract_text_from_pdf(self, file_bytes: bytes) -> str:
-        """Extract text from PDF file."""
-        if not PDF_AVAILABLE:
-            raise ValueError("PDF processing not available. Install PyPDF2: pip install PyPDF2")
+    @_content_cached
+    def extract_text_from_pdf(self, file_bytes: bytes, max_chars: Optional[int] = None) -> str:
+        """Extract text from PDF file, stopping once max_chars have been extracted."""
+        if not (PDFIUM_AVAILABLE or PDF_AVAILABLE):
+            raise ValueError("PDF processing not available. Install pypdfium2: pip install pypdfium2")
         
         try:
+            if PDFIUM_AVAILABLE:
+                return self._extract_text_with_pdfium(file_bytes, max_chars)
+
+            # A character budget is usually met within the first few pages,
+            # so pages are read lazily
             pdf_reader = PyPDF2.PdfReader(BytesIO(file_bytes))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n\n"
-            return text.strip()
+            page_texts = _take_until(
+                (page.extract_text() for page in pdf_reader.pages), max_chars
+            )
+            return "\n\n".join(page_texts).strip()
         except Exception as e:
             logger.error(f"PDF extraction failed: {e}")
             raise ValueError(f"Failed to extract text from PDF: {str(e)}")
     
-    def extract_text_from_docx(self, file_bytes: bytes) -> str:
-        """Extract text from DOCX file."""
+    @staticmethod
+    def _extract_text_with_pdfium(file_bytes: bytes, max_chars: Optional[int] = None) -> str:
+        """Extract PDF text with PDFium, which is far faster than PyPDF2's pure-Python parser."""
+        pdf = pdfium.PdfDocument(file_bytes)
+
+        def page_texts():
+            for page in pdf:
+                textpage = page.get_textpage()
+                yield textpage.get_text_bounded()
+                textpage.close()
+                page.close()
+
+        try:
+            return "\n\n".join(_take_until(page_texts(), max_chars)).strip()
+        finally:
+            pdf.close()
+    
+    @_content_cached
+    def extract_text_from_docx(self, file_bytes: bytes, max_chars: Optional[int] = None) -> str:
+        """Extract text from DOCX file, stopping once max_chars have been extracted."""
         if not DOCX_AVAILABLE:
             raise ValueError("DOCX processing not available. Install python-docx: pip install python-docx")
         
         try:
             doc = docx.Document(BytesIO(file_bytes))
-            text = "\n\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+            # Walk body paragraphs lazily; doc.paragraphs would wrap every
+            # paragraph in the document before the budget could stop the loop
+            paragraphs = (
+                text
+                for text in (
+                    Paragraph(p, doc._body).text
+                    for p in doc.element.body.iterchildren(qn('w:p'))
+                )
+                if text.strip()
+            )
+            text = "\n\n".join(_take_until(paragraphs, max_chars))
             return text.strip()
         except Exception as e:
             logger.error(f"DOCX extraction failed: {e}")
             raise ValueError(f"Failed to extract text from DOCX: {str(e)}")
     
-    def extract_text_from_pptx(self, file_bytes: bytes) -> str:
-        """Extract text from PPTX file."""
+    @_content_cached
+    def extract_text_from_pptx(self, file_bytes: bytes, max_chars: Optional[int] = None) -> str:
+        """Extract text from PPTX file, stopping once max_chars have been extracted."""
         if not PPTX_AVAILABLE:
             raise ValueError("PPTX processing not available. Install python-pptx: pip install python-pptx")
         
         try:
             prs = Presentation(BytesIO(file_bytes))
-            text = ""
-            for slide_num, slide in enumerate(prs.slides, 1):
-                text += f"--- Slide {slide_num} ---\n"
-                for shape in slide.shapes:
-                    if hasattr(shape, "text") and shape.text.strip():
-                        text += shape.text + "\n"
-                text += "\n"
-            return text.strip()
+
+            def slide_texts():
+                for slide_num, slide in enumerate(prs.slides, 1):
+                    parts = [f"--- Slide {slide_num} ---\n"]
+                    for shape in slide.shapes:
+                        if hasattr(shape, "text") and shape.text.strip():
+                            parts.append(shape.text + "\n")
+                    parts.append("\n")
+                    yield "".join(parts)
+
+            return "".join(_take_until(slide_texts(), max_chars)).strip()
         except Exception as e:
             logger.error(f"PPTX extraction failed: {e}")
             raise ValueError(f"Failed to extract text from PPTX: {str(e)}")
@@ -256,21 +442,24 @@ class VisionService:
             file_ext = filename.lower().split('.')[-1]
             
             if file_ext == 'pdf':
-                text = self.extract_text_from_pdf(file_bytes)
+                extract = self.extract_text_from_pdf
             elif file_ext in ['docx', 'doc']:
-                text = self.extract_text_from_docx(file_bytes)
+                extract = self.extract_text_from_docx
             elif file_ext in ['pptx', 'ppt']:
-                text = self.extract_text_from_pptx(file_bytes)
+                extract = self.extract_text_from_pptx
             else:
                 raise ValueError(f"Unsupported document type: {file_ext}")
             
+            # Parsing is CPU-bound; keep it off the event loop
+            text = await asyncio.to_thread(extract, file_bytes, max_chars=DOCUMENT_PROMPT_CHARS)
+            
             if not text.strip():
                 raise ValueError("No text extracted from document")
             
             logger.info(f"Extracted {len(text)} chars from {filename}")
             
             # Analyze with LLM
-            full_prompt = f"{prompt}\n\nDocument content:\n{text[:4000]}"  # Limit to 4000 chars
+            full_prompt = f"{prompt}\n\nDocument content:\n{text[:DOCUMENT_PROMPT_CHARS]}"
             
             response = await self.llm_client.generate_completion_async(
                 messages=[{"role": "user", "content": full_prompt}],
@@ -302,5 +491,7 @@ class VisionService:
             }
 
 
-# Global instance
-vision_service = VisionService()
+@lru_cache(maxsize=1)
+def get_vision_service() -> VisionService:
+    """Get the shared vision service, created on first use rather than at import."""
+    return VisionService()
@@ -3,9 +3,13 @@ Memory Conflict Resolution System
 Detects and resolves conflicting memories automatically
 """
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import Optional, List, Tuple
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import FrozenSet, Optional, List, Tuple
 from uuid import UUID
 from app.models.memory import Memory, MemoryType
 from app.llm_client import get_llm_client
@@ -13,6 +17,11 @@ from app.llm_client import get_llm_client
 logger = logging.getLogger(__name__)
 
 
+def _compile_any(patterns: List[str]) -> re.Pattern:
+    """Compile substring patterns into one alternation scanned in a single pass"""
+    return re.compile("|".join(re.escape(pattern) for pattern in patterns))
+
+
 class ConflictType:
     """Types of memory conflicts"""
     LOCATION_CHANGE = "location_change"  # User moved
@@ -34,6 +43,33 @@ class MemoryConflictResolver:
         "preference": ["like", "love", "hate", "dislike", "prefer"],
     }
     
+    # One compiled regex per category instead of a substring test per pattern
+    PATTERN_REGEXES = {
+        category: _compile_any(patterns)
+        for category, patterns in CONFLICT_PATTERNS.items()
+    }
+    
+    # Candidate pairs judged per LLM call
+    CONFLICT_BATCH_SIZE = 20
+    
+    # Recent LLM verdicts, keyed by (new content, existing content, category)
+    VERDICT_CACHE_SIZE = 10_000
+    _verdict_cache: "OrderedDict[Tuple[str, str, str], bool]" = OrderedDict()
+    
+    # Values that can be compared without the LLM
+    _AGE_VALUE = re.compile(r"\b(\d{1,3})\b")
+    _PLACE_VALUE = re.compile(
+        r"\b(live in|lives in|based in|located in|moved to|work at|works at|working at|employed by|job at)\s+([a-z0-9][a-z0-9 &.'-]*)"
+    )
+    
+    # Pattern-matched categories, in the order they are checked
+    CATEGORY_CONFLICTS = (
+        ("location", ConflictType.LOCATION_CHANGE),
+        ("job", ConflictType.STATUS_CHANGE),
+        ("relationship", ConflictType.STATUS_CHANGE),
+        ("age", ConflictType.FACTUAL_CONTRADICTION),
+    )
+    
     @classmethod
     async def check_conflict(
         cls,
@@ -49,52 +85,55 @@ class MemoryConflictResolver:
         Returns:
             Tuple of (conflicting_memory, conflict_type) or None
         """
-        new_content_lower = new_memory.content.lower()
+        new_categories = cls._content_categories(new_memory.content)
         
-        # Check each existing memory for conflicts
+        # Collect every (existing memory, category) pair worth asking about, in
+        # the order they used to be checked one LLM call at a time
+        candidates = []
         for existing in existing_memories:
-            existing_content_lower = existing.content.lower()
-            
             # Skip if same memory
             if existing.memory_id == new_memory.memory_id:
                 continue
             
-            # Check location conflicts
-            if cls._has_pattern(new_content_lower, cls.CONFLICT_PATTERNS["location"]):
-                if cls._has_pattern(existing_content_lower, cls.CONFLICT_PATTERNS["location"]):
-                    # Both mention location - check if different
-                    if await cls._are_conflicting(new_memory.content, existing.content, "location"):
-                        return (existing, ConflictType.LOCATION_CHANGE)
-            
-            # Check job conflicts
-            if cls._has_pattern(new_content_lower, cls.CONFLICT_PATTERNS["job"]):
-                if cls._has_pattern(existing_content_lower, cls.CONFLICT_PATTERNS["job"]):
-                    if await cls._are_conflicting(new_memory.content, existing.content, "job"):
-                        return (existing, ConflictType.STATUS_CHANGE)
-            
-            # Check relationship conflicts
-            if cls._has_pattern(new_content_lower, cls.CONFLICT_PATTERNS["relationship"]):
-                if cls._has_pattern(existing_content_lower, cls.CONFLICT_PATTERNS["relationship"]):
-                    if await cls._are_conflicting(new_memory.content, existing.content, "relationship"):
-                        return (existing, ConflictType.STATUS_CHANGE)
-            
-            # Check age conflicts (should only increase)
-            if cls._has_pattern(new_content_lower, cls.CONFLICT_PATTERNS["age"]):
-                if cls._has_pattern(existing_content_lower, cls.CONFLICT_PATTERNS["age"]):
-                    if await cls._are_conflicting(new_memory.content, existing.content, "age"):
-                        return (existing, ConflictType.FACTUAL_CONTRADICTION)
+            # Location, job, relationship and age conflicts: both memories must
+            # mention the category before the LLM is asked to compare them
+            if new_categories:
+                shared = new_categories & cls._content_categories(existing.content)
+                for category, conflict_type in cls.CATEGORY_CONFLICTS:
+                    if category in shared:
+                        candidates.append((existing, category, conflict_type))
             
             # Check preference changes (less critical)
             if new_memory.type == MemoryType.PREFERENCE and existing.type == MemoryType.PREFERENCE:
-                if await cls._are_conflicting(new_memory.content, existing.content, "preference"):
-                    return (existing, ConflictType.PREFERENCE_CHANGE)
+                candidates.append((existing, "preference", ConflictType.PREFERENCE_CHANGE))
+        
+        # Judge candidates in batches, stopping at the first batch with a conflict
+        for start in range(0, len(candidates), cls.CONFLICT_BATCH_SIZE):
+            batch = candidates[start:start + cls.CONFLICT_BATCH_SIZE]
+            verdicts = await cls._are_conflicting_batch(
+                new_memory.content,
+                [(existing.content, category) for existing, category, _ in batch],
+            )
+            for (existing, _, conflict_type), conflicting in zip(batch, verdicts):
+                if conflicting:
+                    return (existing, conflict_type)
         
         return None
     
-    @classmethod
-    def _has_pattern(cls, text: str, patterns: List[str]) -> bool:
-        """Check if text contains any of the patterns"""
-        return any(pattern in text for pattern in patterns)
+    @staticmethod
+    @lru_cache(maxsize=10_000)
+    def _content_categories(content: str) -> FrozenSet[str]:
+        """Get the pattern-matched conflict categories a memory's content mentions.
+        
+        Cached per content string, so a user's existing memories are lowercased
+        and scanned once rather than on every check_conflict call.
+        """
+        text = content.lower()
+        return frozenset(
+            category
+            for category, _ in MemoryConflictResolver.CATEGORY_CONFLICTS
+            if MemoryConflictResolver.PATTERN_REGEXES[category].search(text)
+        )
     
     @classmethod
     async def _are_conflicting(
@@ -113,14 +152,80 @@ class MemoryConflictResolver:
         Returns:
             True if conflicting
         """
+        verdicts = await cls._are_conflicting_batch(content1, [(content2, category)])
+        return verdicts[0]
+    
+    @classmethod
+    def _quick_verdict(cls, content1: str, content2: str, category: str) -> Optional[bool]:
+        """Decide a conflict without the LLM when simple rules settle it.
+        
+        Returns:
+            True/False when the rules are conclusive, None when the LLM must decide
+        """
+        text1 = " ".join(content1.lower().split())
+        text2 = " ".join(content2.lower().split())
+        if text1 == text2:
+            return False
+        
+        if category == "age":
+            ages1 = cls._AGE_VALUE.findall(text1)
+            ages2 = cls._AGE_VALUE.findall(text2)
+            if len(ages1) == 1 and len(ages2) == 1:
+                return int(ages1[0]) != int(ages2[0])
+        
+        elif category in ("location", "job"):
+            # Same phrase naming the same place/employer is not a conflict;
+            # anything else (different values, mixed phrasings) goes to the LLM
+            match1 = cls._PLACE_VALUE.search(text1)
+            match2 = cls._PLACE_VALUE.search(text2)
+            if match1 and match2 and match1.group(1) == match2.group(1):
+                if match1.group(2).strip(" .") == match2.group(2).strip(" ."):
+                    return False
+        
+        return None
+    
+    @classmethod
+    async def _are_conflicting_batch(
+        cls,
+        new_content: str,
+        pairs: List[Tuple[str, str]]
+    ) -> List[bool]:
+        """Use one LLM call to determine which existing statements conflict with a new one.
+        
+        Args:
+            new_content: The new statement
+            pairs: (existing statement, category) pairs to compare it against
+            
+        Returns:
+            One verdict per pair, True if conflicting
+        """
+        verdicts: List[Optional[bool]] = []
+        for content, category in pairs:
+            key = (new_content, content, category)
+            verdict = cls._verdict_cache.get(key)
+            if verdict is None:
+                verdict = cls._quick_verdict(new_content, content, category)
+            verdicts.append(verdict)
+        
+        pending = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        if not pending:
+            return verdicts
+        
         try:
-            prompt = f"""Determine if these two statements about {category} conflict:
+            numbered = "\n".join(
+                f"{n}. [{pairs[i][1]}] {pairs[i][0]}"
+                for n, i in enumerate(pending, 1)
+            )
+            prompt = f"""Determine whether the new statement conflicts with each numbered statement,
+judged within the category shown in brackets.
+
+New statement: {new_content}
 
-Statement 1: {content1}
-Statement 2: {content2}
+Statements:
+{numbered}
 
-Return ONLY a JSON object with this format:
-{{"conflict": true/false, "reason": "brief explanation"}}
+Return ONLY a JSON object with this format, one boolean per numbered statement in order:
+{{"conflicts": [true/false, ...]}}
 
 Examples of conflicts:
 - "Lives in Chennai" vs "Lives in Bangalore" = TRUE
@@ -129,17 +234,28 @@ Examples of conflicts:
 - "Likes pizza" vs "Loves pizza" = FALSE (same preference)
 """
             
-            response = get_llm_client().extract_json([
+            # The LLM client is synchronous; keep it off the event loop
+            response = await asyncio.to_thread(get_llm_client().extract_json, [
                 {"role": "system", "content": "You are a conflict detection system. Determine if statements contradict."},
                 {"role": "user", "content": prompt}
             ])
             
-            return response.get("conflict", False)
+            conflicts = response.get("conflicts", [])
+            if not isinstance(conflicts, list) or len(conflicts) != len(pending):
+                raise ValueError(f"expected {len(pending)} verdicts, got {conflicts!r}")
         
         except Exception as e:
             logger.warning(f"Conflict detection failed: {e}")
-            # Conservative: assume no conflict if detection fails
-            return False
+            # Conservative: assume no conflict if detection fails (not cached)
+            return [bool(verdict) for verdict in verdicts]
+        
+        for i, conflict in zip(pending, conflicts):
+            verdicts[i] = conflict is True
+            cls._verdict_cache[(new_content, pairs[i][0], pairs[i][1])] = verdicts[i]
+        while len(cls._verdict_cache) > cls.VERDICT_CACHE_SIZE:
+            cls._verdict_cache.popitem(last=False)
+        
+        return verdicts
     
     @classmethod
     async def resolve_conflict(
@@ -169,6 +285,8 @@ Examples of conflicts:
         try:
             # Determine resolution strategy
             resolution = "newer_wins"
+            # Second precision is plenty for audit context and keeps the JSON short
+            now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
             
             # Critical conflicts (location, job changes) - mark old as outdated
             if conflict_type in [ConflictType.LOCATION_CHANGE, ConflictType.STATUS_CHANGE]:
@@ -181,7 +299,7 @@ Examples of conflicts:
                 
                 # Add context to old memory
                 old_memory.metadata.context["superseded_by"] = str(new_memory.memory_id)
-                old_memory.metadata.context["superseded_at"] = datetime.utcnow().isoformat()
+                old_memory.metadata.context["superseded_at"] = now_iso
                 old_memory.metadata.context["resolution"] = "outdated_information"
                 
                 # Update old memory with context
@@ -2,11 +2,11 @@
 
 import asyncio
 import hashlib
-import json
 import logging
 from functools import lru_cache
-from typing import Optional
+from typing import Collection, Optional
 
+import numpy as np
 import openai
 from redis import asyncio as aioredis
 
@@ -15,6 +15,13 @@ from app.config import get_settings
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Quantized ONNX export shipped with sentence-transformers hub models; uses
+# AVX-512 VNNI int8 kernels where the CPU has them
+ONNX_INT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+# How long generate_coalesced waits for more texts before flushing a batch
+COALESCE_WINDOW_SECONDS = 0.005
+
 # Try to import sentence transformers
 try:
     from sentence_transformers import SentenceTransformer
@@ -25,18 +32,32 @@ except ImportError:
     logger.warning("sentence-transformers not available")
 
 
+def _encode_embedding(embedding: list[float]) -> bytes:
+    """Pack an embedding as raw float32 bytes for the Redis cache."""
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+
+def _decode_embedding(raw: bytes) -> list[float]:
+    """Unpack an embedding written by ``_encode_embedding``."""
+    return np.frombuffer(raw, dtype=np.float32).tolist()
+
+
 @lru_cache(maxsize=1)
-def _get_sentence_transformer(model_name: str):
+def _get_sentence_transformer(model_name: str, backend: str = "torch"):
     """Cached loader for SentenceTransformer model.
     
     Args:
         model_name: Name of the model to load
+        backend: "torch", "onnx", or "onnx-int8" (ONNX Runtime via optimum)
         
     Returns:
         Loaded SentenceTransformer model
     """
-    logger.info(f"Loading Sentence Transformer model: {model_name}")
-    model = SentenceTransformer(model_name)
+    logger.info(f"Loading Sentence Transformer model: {model_name} ({backend})")
+    if backend == "onnx-int8":
+        model = SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+    else:
+        model = SentenceTransformer(model_name, backend=backend)
     logger.info(f"✅ Sentence Transformers ready. Dimension: {model.get_sentence_embedding_dimension()}")
     return model
 
@@ -55,6 +76,10 @@ class EmbeddingGenerator:
         """
         self.redis = redis_client
         self.cache_ttl = settings.redis_cache_ttl
+
+        # Pending (text, future, cache_checked) entries for generate_coalesced
+        self._pending: list[tuple[str, asyncio.Future, bool]] = []
+        self._flush_task: Optional[asyncio.Task] = None
         
         # Initialize based on provider
         if settings.embedding_provider == "sentence-transformers":
@@ -67,7 +92,7 @@ class EmbeddingGenerator:
                     "Change EMBEDDING_PROVIDER=openai in .env"
                 )
             try:
-                self.st_model = _get_sentence_transformer(settings.embedding_model)
+                self.st_model = _get_sentence_transformer(settings.embedding_model, settings.embedding_backend)
                 self.dimension = self.st_model.get_sentence_embedding_dimension()
                 self.use_openai = False
                 self.model = settings.embedding_model
@@ -82,15 +107,24 @@ class EmbeddingGenerator:
             self.use_openai = True
             logger.info(f"OpenAI embeddings ready. Model: {self.model}")
 
+        # v2: values are raw float32 bytes rather than JSON
+        # int8 vectors differ slightly from full precision ones, so keep them apart
+        provider = "openai" if self.use_openai else "st"
+        if not self.use_openai and settings.embedding_backend == "onnx-int8":
+            provider = "st-int8"
+        self._key_prefix = f"embedding:v2:{provider}:{self.model}:"
+
     def _cache_key(self, text: str) -> str:
         """Generate cache key for text."""
-        text_hash = hashlib.sha256(text.encode()).hexdigest()
-        provider = "openai" if self.use_openai else "st"
-        return f"embedding:{provider}:{self.model}:{text_hash}"
+        # Non-cryptographic use: BLAKE2b is faster than SHA-256 in software
+        return self._key_prefix + hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
 
     async def generate(self, text: str) -> list[float]:
         """Generate embedding for a single text.
         
+        Cache hits return immediately; misses go through generate_coalesced so
+        concurrent requests share one provider call.
+        
         Args:
             text: Text to embed
             
@@ -101,63 +135,184 @@ class EmbeddingGenerator:
             Exception: If embedding generation fails
         """
         # Check cache first
+        cache_checked = False
         if self.redis:
             cache_key = self._cache_key(text)
             try:
-                cached = await self.redis.get(cache_key)
+                # GETEX slides the TTL on hits in the same round-trip
+                cached = await self.redis.getex(cache_key, ex=self.cache_ttl)
                 if cached:
-                    logger.debug(f"Embedding cache hit for text length {len(text)}")
-                    return json.loads(cached)
+                    logger.debug("Embedding cache hit for text length %d", len(text))
+                    return _decode_embedding(cached)
+                cache_checked = True
             except Exception as e:
                 logger.warning(f"Cache read error: {e}")
 
-        # Generate embedding based on provider
-        if self.use_openai:
-            embedding = await self._generate_openai(text)
-        else:
-            embedding = self._generate_sentence_transformer(text)
+        # Batched with other in-flight requests; generate_batch caches the result
+        # (without reading the cache again for a text just found missing)
+        embedding = await self.generate_coalesced(text, cache_checked=cache_checked)
+
+        logger.debug("Generated embedding for text length %d", len(text))
+        return embedding
+
+    async def generate_coalesced(self, text: str, cache_checked: bool = False) -> list[float]:
+        """Generate an embedding, batching with other concurrent callers.
+        
+        Calls made within COALESCE_WINDOW_SECONDS of each other share a
+        single generate_batch call, which is far cheaper per text than
+        embedding them one at a time.
+        
+        Args:
+            text: Text to embed
+            cache_checked: The caller has just missed the cache for this text,
+                so the batch skips looking it up again
+            
+        Returns:
+            Embedding vector
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future, cache_checked))
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_pending())
+
+        return await future
+
+    async def _flush_pending(self) -> None:
+        """Embed queued generate_coalesced texts in batches after a short window."""
+        await asyncio.sleep(COALESCE_WINDOW_SECONDS)
+
+        while self._pending:
+            batch = self._pending[:settings.batch_embedding_size]
+            del self._pending[:settings.batch_embedding_size]
+            known_misses = {text for text, _, cache_checked in batch if cache_checked}
 
-        # Cache the result
-        if self.redis:
             try:
-                await self.redis.setex(
-                    cache_key,
-                    self.cache_ttl,
-                    json.dumps(embedding),
+                embeddings = await self.generate_batch(
+                    [text for text, _, _ in batch], known_misses=known_misses
                 )
             except Exception as e:
-                logger.warning(f"Cache write error: {e}")
+                if len(batch) == 1:
+                    embeddings = [e]
+                else:
+                    # One bad text (e.g. over the provider's length limit) must
+                    # not fail everyone it was batched with: retry each alone so
+                    # only the failing caller sees the error
+                    logger.warning(f"Coalesced embedding batch failed, retrying individually: {e}")
+                    embeddings = await asyncio.gather(
+                        *(
+                            self.generate_batch([text], known_misses=known_misses)
+                            for text, _, _ in batch
+                        ),
+                        return_exceptions=True,
+                    )
+                    embeddings = [
+                        result if isinstance(result, BaseException) else result[0]
+                        for result in embeddings
+                    ]
 
-        logger.debug(f"Generated embedding for text length {len(text)}")
-        return embedding
+            for (_, future, _), embedding in zip(batch, embeddings):
+                if future.done():
+                    continue
+                if isinstance(embedding, BaseException):
+                    future.set_exception(embedding)
+                else:
+                    future.set_result(embedding)
+
+    async def _generate_batch_openai(self, texts: list[str]) -> list[list[float]]:
+        """Generate embeddings for several texts with one OpenAI API call."""
+        response = await self.client.embeddings.create(
+            input=texts,
+            model=self.model,
+        )
+        return [embedding_data.embedding for embedding_data in response.data]
+
+    def _generate_batch_st(self, texts: list[str], batch_size: int) -> list[list[float]]:
+        """Generate embeddings for several texts with one Sentence Transformers call.
+        
+        encode() already sorts its input by length before forming mini-batches,
+        so padding waste is handled there.
+        """
+        embeddings = self.st_model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return embeddings.tolist()
+
+    async def _embed_chunk(
+        self,
+        batch: list[str],
+        batch_size: int,
+        known_misses: Collection[str] = (),
+    ) -> list[list[float]]:
+        """Embed one chunk of texts, serving what it can from the cache.
+        
+        Args:
+            batch: Texts to embed
+            batch_size: Mini-batch size for the local model
+            known_misses: Texts already known to be uncached; not looked up
+            
+        Returns:
+            Embedding vectors in input order
+        """
+        # Check cache for the rest of the batch in one round trip
+        batch_embeddings = [None] * len(batch)
+        keys = [self._cache_key(text) for text in batch]
+        lookup = [idx for idx, text in enumerate(batch) if text not in known_misses]
+        if self.redis and lookup:
+            try:
+                cached_values = await self.redis.mget([keys[idx] for idx in lookup])
+                for idx, cached in zip(lookup, cached_values):
+                    if cached:
+                        batch_embeddings[idx] = _decode_embedding(cached)
+            except Exception as e:
+                logger.warning(f"Cache read error: {e}")
 
-    async def _generate_openai(self, text: str) -> list[float]:
-        """Generate embedding using OpenAI API."""
-        try:
-            response = await self.client.embeddings.create(
-                input=text,
-                model=self.model,
-            )
-            return response.data[0].embedding
-        except Exception as e:
-            logger.error(f"OpenAI embedding generation failed: {e}")
-            raise
-
-    def _generate_sentence_transformer(self, text: str) -> list[float]:
-        """Generate embedding using Sentence Transformers (local, synchronous)."""
-        embedding = self.st_model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        uncached_indices = [idx for idx, embedding in enumerate(batch_embeddings) if embedding is None]
+        uncached_texts = [batch[idx] for idx in uncached_indices]
+
+        # Generate embeddings for uncached texts
+        if uncached_texts:
+            try:
+                if self.use_openai:
+                    generated = await self._generate_batch_openai(uncached_texts)
+                else:
+                    generated = self._generate_batch_st(uncached_texts, batch_size)
+            except Exception as e:
+                logger.error(f"Batch embedding generation failed: {e}")
+                raise
+
+            # Insert generated embeddings
+            for idx, embedding in zip(uncached_indices, generated):
+                batch_embeddings[idx] = embedding
+
+            # Cache the results in one pipelined round trip
+            if self.redis:
+                try:
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for idx, embedding in zip(uncached_indices, generated):
+                            pipe.setex(keys[idx], self.cache_ttl, _encode_embedding(embedding))
+                        await pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Cache write error: {e}")
+
+        return batch_embeddings
 
     async def generate_batch(
         self,
         texts: list[str],
         batch_size: Optional[int] = None,
+        known_misses: Collection[str] = (),
     ) -> list[list[float]]:
         """Generate embeddings for multiple texts efficiently.
         
         Args:
             texts: List of texts to embed
             batch_size: Batch size for API calls (default from settings)
+            known_misses: Texts the caller just found missing from the cache;
+                they are embedded without another cache lookup
             
         Returns:
             List of embedding vectors
@@ -168,100 +323,33 @@ class EmbeddingGenerator:
         if batch_size is None:
             batch_size = settings.batch_embedding_size
 
-        embeddings = []
-        
-        # Process in batches
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            
-            # Check cache for each text in batch
-            batch_embeddings = []
-            uncached_indices = []
-            uncached_texts = []
-            
-            for idx, text in enumerate(batch):
-                if self.redis:
-                    cache_key = self._cache_key(text)
-                    try:
-                        cached = await self.redis.get(cache_key)
-                        if cached:
-                            # Try JSON first (sentence-transformers), fallback to CSV (OpenAI legacy)
-                            try:
-                                batch_embeddings.append(json.loads(cached))
-                            except (json.JSONDecodeError, TypeError):
-                                batch_embeddings.append(
-                                    [float(x) for x in cached.decode().split(",")]
-                                )
-                            continue
-                    except Exception:
-                        pass
-                
-                # Not in cache
-                uncached_indices.append(len(batch_embeddings))
-                uncached_texts.append(text)
-                batch_embeddings.append(None)  # Placeholder
-
-            # Generate embeddings for uncached texts
-            if uncached_texts:
-                try:
-                    if self.use_openai:
-                        # OpenAI API batch generation
-                        response = await self.client.embeddings.create(
-                            input=uncached_texts,
-                            model=self.model,
-                        )
-                        
-                        # Insert generated embeddings
-                        for idx, embedding_data in enumerate(response.data):
-                            embedding = embedding_data.embedding
-                            batch_embeddings[uncached_indices[idx]] = embedding
-                            
-                            # Cache the result
-                            if self.redis:
-                                try:
-                                    cache_key = self._cache_key(uncached_texts[idx])
-                                    await self.redis.setex(
-                                        cache_key,
-                                        self.cache_ttl,
-                                        json.dumps(embedding),
-                                    )
-                                except Exception as e:
-                                    logger.warning(f"Cache write error: {e}")
-                    else:
-                        # Sentence Transformers batch generation (synchronous)
-                        batch_embeddings_list = self.st_model.encode(uncached_texts, convert_to_numpy=True)
-                        
-                        # Insert generated embeddings
-                        for idx, embedding_array in enumerate(batch_embeddings_list):
-                            embedding = embedding_array.tolist()
-                            batch_embeddings[uncached_indices[idx]] = embedding
-                            
-                            # Cache the result
-                            if self.redis:
-                                try:
-                                    cache_key = self._cache_key(uncached_texts[idx])
-                                    await self.redis.setex(
-                                        cache_key,
-                                        self.cache_ttl,
-                                        json.dumps(embedding),
-                                    )
-                                except Exception as e:
-                                    logger.warning(f"Cache write error: {e}")
+        # Embed each distinct text once and scatter the results back
+        positions = {}
+        inverse = [positions.setdefault(text, len(positions)) for text in texts]
+        unique_texts = list(positions)
 
-                except Exception as e:
-                    logger.error(f"Batch embedding generation failed: {e}")
-                    raise
+        # OpenAI requests are chunked by batch_size and sent concurrently, up to
+        # embedding_concurrency at a time. The local model takes everything at
+        # once: encode() length-sorts its whole input before forming batch_size
+        # mini-batches, so similar lengths share padding
+        chunk_size = batch_size if self.use_openai else len(unique_texts)
+        chunks = [unique_texts[i:i + chunk_size] for i in range(0, len(unique_texts), chunk_size)]
 
-            embeddings.extend(batch_embeddings)
-            
-            # Small delay between batches to avoid rate limits
-            if i + batch_size < len(texts):
-                await asyncio.sleep(0.1)
+        semaphore = asyncio.Semaphore(settings.embedding_concurrency)
+
+        async def bounded(chunk: list[str]) -> list[list[float]]:
+            async with semaphore:
+                return await self._embed_chunk(chunk, batch_size, known_misses)
+
+        results = await asyncio.gather(*(bounded(chunk) for chunk in chunks))
+
+        unique_embeddings = [embedding for chunk in results for embedding in chunk]
+        embeddings = [unique_embeddings[idx] for idx in inverse]
 
         logger.info(f"Generated {len(embeddings)} embeddings in batches")
         return embeddings
 
-    async def similarity(
+    def similarity(
         self,
         embedding1: list[float],
         embedding2: list[float],
@@ -275,13 +363,14 @@ class EmbeddingGenerator:
         Returns:
             Similarity score between 0 and 1
         """
-        dot_product = sum(a * b for a, b in zip(embedding1, embedding2))
-        magnitude1 = sum(a * a for a in embedding1) ** 0.5
-        magnitude2 = sum(b * b for b in embedding2) ** 0.5
+        a = np.asarray(embedding1, dtype=np.float32)
+        b = np.asarray(embedding2, dtype=np.float32)
+        magnitude1 = np.linalg.norm(a)
+        magnitude2 = np.linalg.norm(b)
         
         if magnitude1 == 0 or magnitude2 == 0:
             return 0.0
         
-        similarity = dot_product / (magnitude1 * magnitude2)
+        similarity = float(a @ b) / float(magnitude1 * magnitude2)
         # Normalize to 0-1 range (cosine similarity is -1 to 1)
         return (similarity + 1) / 2
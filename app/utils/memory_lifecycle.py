@@ -5,7 +5,7 @@ from datetime import datetime, timedelta
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import text
+from sqlalchemy import JSON, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.memory import MemoryType
@@ -26,6 +26,35 @@ MEMORY_TTL_POLICY = {
 # Default TTL for temporary context (if we add TEMP_CONTEXT type later)
 DEFAULT_TEMP_CONTEXT_TTL = 50  # turns
 
+# Per-type stats assembled into the response object by Postgres itself
+_MEMORY_STATS_SQL = text("""
+    WITH per_type AS (
+        SELECT
+            type,
+            COUNT(*) AS count,
+            ROUND(COALESCE(AVG(EXTRACT(DAYS FROM (NOW() - created_at))), 0), 1) AS avg_age_days,
+            CASE WHEN type = 'commitment'
+                THEN COUNT(*) FILTER (WHERE context->>'fulfilled' = 'true')
+            END AS fulfilled_count
+        FROM memories
+        WHERE user_id = :user_id
+        GROUP BY type
+    )
+    SELECT json_build_object(
+        'by_type', COALESCE(
+            json_object_agg(type, json_build_object(
+                'count', count,
+                'avg_age_days', avg_age_days,
+                'fulfilled_count', fulfilled_count
+            )),
+            '{}'::json
+        ),
+        'total_count', COALESCE(SUM(count), 0)::bigint,
+        'fulfilled_commitments', COALESCE(MAX(fulfilled_count), 0)
+    ) AS stats
+    FROM per_type
+""").columns(stats=JSON)
+
 
 async def expire_old_memories(
     session: AsyncSession,
@@ -69,11 +98,10 @@ async def expire_old_memories(
             expired_count = result.scalar()
             logger.info(f"[DRY RUN] Would expire {expired_count} memories")
         else:
-            # Delete expired memories
+            # Delete expired memories (rowcount comes from the command tag)
             query = text(f"""
                 DELETE FROM memories
                 WHERE {where_clause}
-                RETURNING memory_id
             """)
             result = await session.execute(query, params)
             await session.commit()
@@ -229,43 +257,8 @@ async def get_memory_stats_with_ttl(
         Dictionary with memory stats
     """
     try:
-        query = text("""
-            SELECT
-                type,
-                COUNT(*) as count,
-                AVG(EXTRACT(DAYS FROM (NOW() - created_at))) as avg_age_days,
-                COUNT(CASE WHEN context->>'fulfilled' = 'true' THEN 1 END) as fulfilled_count
-            FROM memories
-            WHERE user_id = :user_id
-            GROUP BY type
-        """)
-        
-        result = await session.execute(query, {"user_id": user_id})
-        rows = result.fetchall()
-        
-        stats = {
-            "by_type": {},
-            "total_count": 0,
-            "fulfilled_commitments": 0
-        }
-        
-        for row in rows:
-            memory_type = row[0]
-            count = row[1]
-            avg_age = row[2] or 0
-            fulfilled = row[3] or 0
-            
-            stats["by_type"][memory_type] = {
-                "count": count,
-                "avg_age_days": round(avg_age, 1),
-                "fulfilled_count": fulfilled if memory_type == "commitment" else None
-            }
-            stats["total_count"] += count
-            
-            if memory_type == "commitment":
-                stats["fulfilled_commitments"] = fulfilled
-        
-        return stats
+        result = await session.execute(_MEMORY_STATS_SQL, {"user_id": user_id})
+        return result.scalar_one()
         
     except Exception as e:
         logger.error(f"Failed to get memory stats: {e}")
@@ -4,10 +4,15 @@ Makes important memories last longer while less important ones fade
 """
 
 import math
+import re
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Sequence
 from enum import Enum
 
+import numpy as np
+
+from app.models.memory import MemoryType
+
 
 class ImportanceLevel(Enum):
     """Memory importance levels"""
@@ -17,17 +22,30 @@ class ImportanceLevel(Enum):
     LOW = "low"  # Fast decay: small talk, temporary info
 
 
+def _keyword_regex(keywords: list[str]) -> re.Pattern:
+    """Compile keywords into one alternation so a text is scanned once"""
+    return re.compile("|".join(re.escape(kw) for kw in keywords))
+
+
 class MemoryWeightCalculator:
     """Calculate and manage memory importance weights"""
     
     # Base importance scores by memory type
     TYPE_IMPORTANCE = {
-        "ENTITY": 0.8,  # People, places important
-        "FACT": 0.7,  # Facts moderately important
-        "PREFERENCE": 0.75,  # Preferences fairly important
-        "COMMITMENT": 0.9,  # Commitments very important
-        "EPISODIC": 0.6,  # Conversations less important
-        "INSTRUCTION": 0.85,  # Instructions very important
+        MemoryType.ENTITY: 0.8,  # People, places important
+        MemoryType.FACT: 0.7,  # Facts moderately important
+        MemoryType.PREFERENCE: 0.75,  # Preferences fairly important
+        MemoryType.COMMITMENT: 0.9,  # Commitments very important
+        MemoryType.INSTRUCTION: 0.85,  # Instructions very important
+    }
+    
+    # Importance level by memory type when no keyword applies
+    TYPE_IMPORTANCE_LEVEL = {
+        MemoryType.COMMITMENT: ImportanceLevel.HIGH,  # Commitments and instructions are high
+        MemoryType.INSTRUCTION: ImportanceLevel.HIGH,
+        MemoryType.PREFERENCE: ImportanceLevel.MEDIUM,  # Preferences and entities are medium
+        MemoryType.ENTITY: ImportanceLevel.MEDIUM,
+        MemoryType.FACT: ImportanceLevel.LOW,  # Facts are low by default
     }
     
     # Decay rates (weight loss per day)
@@ -50,10 +68,13 @@ class MemoryWeightCalculator:
         "deadline", "appointment", "meeting", "promise"
     ]
     
+    _CRITICAL_RE = _keyword_regex(CRITICAL_KEYWORDS)
+    _HIGH_IMPORTANCE_RE = _keyword_regex(HIGH_IMPORTANCE_KEYWORDS)
+    
     @classmethod
     def calculate_initial_weight(
         cls,
-        memory_type: str,
+        memory_type: MemoryType,
         content: str,
         confidence: float,
         context: dict
@@ -61,7 +82,7 @@ class MemoryWeightCalculator:
         """Calculate initial memory weight and importance level.
         
         Args:
-            memory_type: Type of memory (ENTITY, FACT, etc.)
+            memory_type: Type of memory (MemoryType member or its value)
             content: Memory content text
             confidence: Extraction confidence (0-1)
             context: Memory context metadata
@@ -75,29 +96,19 @@ class MemoryWeightCalculator:
         content_lower = content.lower()
         
         # Check for critical keywords (identity, relationships, goals)
-        if any(kw in content_lower for kw in cls.CRITICAL_KEYWORDS):
+        if cls._CRITICAL_RE.search(content_lower):
             importance = ImportanceLevel.CRITICAL
             weight = 1.0  # Maximum importance
         
         # Check for high importance keywords
-        elif any(kw in content_lower for kw in cls.HIGH_IMPORTANCE_KEYWORDS):
+        elif cls._HIGH_IMPORTANCE_RE.search(content_lower):
             importance = ImportanceLevel.HIGH
             weight = min(base_weight * 1.3, 1.0)
         
-        # Commitments and instructions are high importance
-        elif memory_type in ["COMMITMENT", "INSTRUCTION"]:
-            importance = ImportanceLevel.HIGH
-            weight = base_weight
-        
-        # Preferences and entities are medium
-        elif memory_type in ["PREFERENCE", "ENTITY"]:
-            importance = ImportanceLevel.MEDIUM
-            weight = base_weight
-        
-        # Facts and episodic are low by default
+        # Otherwise the memory type decides; low importance is discounted
         else:
-            importance = ImportanceLevel.LOW
-            weight = base_weight * 0.8
+            importance = cls.TYPE_IMPORTANCE_LEVEL.get(memory_type, ImportanceLevel.LOW)
+            weight = base_weight * 0.8 if importance is ImportanceLevel.LOW else base_weight
         
         # Adjust by confidence
         weight *= confidence
@@ -121,7 +132,8 @@ class MemoryWeightCalculator:
         importance_level: ImportanceLevel,
         created_at: datetime,
         access_count: int = 0,
-        last_accessed: Optional[datetime] = None
+        last_accessed: Optional[datetime] = None,
+        now: Optional[datetime] = None
     ) -> float:
         """Calculate current weight with time decay and access boost.
         
@@ -131,6 +143,7 @@ class MemoryWeightCalculator:
             created_at: When memory was created
             access_count: Number of times accessed
             last_accessed: When last accessed
+            now: Reference time (defaults to utcnow)
             
         Returns:
             Current decayed weight (0-1)
@@ -140,8 +153,9 @@ class MemoryWeightCalculator:
             return initial_weight
         
         # Calculate time-based decay
-        days_old = (datetime.utcnow() - created_at).days
-        decay_rate = cls.DECAY_RATES[importance_level]
+        now = now or datetime.utcnow()
+        days_old = (now - created_at).days
+        decay_rate = _DECAY_RATE_VEC[_LEVEL_INDEX[importance_level]]
         
         # Exponential decay: weight = initial * e^(-decay_rate * days)
         time_decay = math.exp(-decay_rate * days_old)
@@ -153,7 +167,7 @@ class MemoryWeightCalculator:
         # Boost if accessed recently (within 7 days)
         recency_boost = 0.0
         if last_accessed:
-            days_since_access = (datetime.utcnow() - last_accessed).days
+            days_since_access = (now - last_accessed).days
             if days_since_access < 7:
                 recency_boost = 0.1 * (1 - days_since_access / 7)
         
@@ -162,6 +176,64 @@ class MemoryWeightCalculator:
         
         return round(final_weight, 3)
     
+    @classmethod
+    def calculate_current_weights(
+        cls,
+        initial_weights: Sequence[float],
+        importance_levels: Sequence[ImportanceLevel],
+        created_at: Sequence[datetime],
+        access_counts: Sequence[int],
+        last_accessed: Sequence[Optional[datetime]],
+        now: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """Vectorized calculate_current_weight over many memories at once.
+        
+        Args:
+            initial_weights: Original weights when created
+            importance_levels: Importance level of each memory
+            created_at: When each memory was created
+            access_counts: Number of times each memory was accessed
+            last_accessed: When each memory was last accessed (None if never)
+            now: Reference time shared by the whole batch (defaults to utcnow)
+            
+        Returns:
+            Array of current decayed weights (0-1), in input order
+        """
+        now = np.datetime64(now or datetime.utcnow(), "us")
+        one_day = np.timedelta64(1, "D")
+        
+        initial = np.asarray(initial_weights, dtype=np.float64)
+        level_idx = np.fromiter(
+            (_LEVEL_INDEX[level] for level in importance_levels),
+            dtype=np.intp,
+            count=len(initial),
+        )
+        
+        # Exponential time decay on whole days, as in the scalar version
+        days_old = (now - np.asarray(created_at, dtype="datetime64[us]")) // one_day
+        decayed = initial * np.exp(-_DECAY_RATE_LUT[level_idx] * days_old)
+        
+        # Access boost (each access adds 0.05, max +0.3)
+        access_boost = np.minimum(np.asarray(access_counts, dtype=np.float64) * 0.05, 0.3)
+        
+        # Recency boost for memories accessed within the last 7 days
+        accessed = np.array(
+            [ts if ts is not None else now for ts in last_accessed],
+            dtype="datetime64[us]",
+        )
+        has_access = np.fromiter((ts is not None for ts in last_accessed), dtype=bool, count=len(initial))
+        days_since_access = (now - accessed) // one_day
+        recency_boost = np.where(
+            has_access & (days_since_access < 7),
+            0.1 * (1 - days_since_access / 7),
+            0.0,
+        )
+        
+        final = np.round(np.minimum(decayed + access_boost + recency_boost, 1.0), 3)
+        
+        # CRITICAL memories never decay
+        return np.where(level_idx == _LEVEL_INDEX[ImportanceLevel.CRITICAL], initial, final)
+    
     @classmethod
     def should_compress(
         cls,
@@ -267,37 +339,59 @@ class MemoryWeightCalculator:
         return round(final_score, 3)
 
 
+# Decay rate per importance level, indexed by _LEVEL_INDEX (tuple for the
+# scalar path, array for vectorized math)
+_LEVEL_INDEX = {level: idx for idx, level in enumerate(ImportanceLevel)}
+_DECAY_RATE_VEC = tuple(MemoryWeightCalculator.DECAY_RATES[level] for level in ImportanceLevel)
+_DECAY_RATE_LUT = np.array(_DECAY_RATE_VEC)
+
+
 class MemoryDecayManager:
     """Manage automatic memory decay"""
     
     @staticmethod
-    async def decay_all_memories(storage):
+    async def decay_all_memories(storage, batch_size: int = 500):
         """Run decay calculation on all memories (should be scheduled).
         
+        Memories are streamed in batches so only one batch is held in memory.
+        
         Args:
             storage: MemoryStorage instance
+            batch_size: Rows fetched and decayed per batch
+            
+        Returns:
+            Number of memories whose weight was updated
         """
-        from app.models.memory import Memory
-        
         # This would typically run as a background job (e.g., daily cron)
         # For now, it's a manual trigger endpoint
         
-        memories = await storage.list_memories(limit=10000)  # Batch process
-        
-        updated_count = 0
-        for memory in memories:
-            # Calculate current weight
-            current_weight = MemoryWeightCalculator.calculate_current_weight(
-                initial_weight=memory.metadata.importance_score or 0.7,
-                importance_level=ImportanceLevel(memory.metadata.importance_level or "medium"),
-                created_at=memory.metadata.created_at,
-                access_count=memory.metadata.access_count or 0,
-                last_accessed=memory.metadata.last_accessed
+        # One reference time for every batch, so the pass is consistent
+        now = datetime.utcnow()
+        
+        updated = 0
+        async for rows in storage.stream_decay_rows(batch_size):
+            # Calculate current weights for the whole batch in one vectorized pass
+            current_weights = MemoryWeightCalculator.calculate_current_weights(
+                initial_weights=[r["importance_score"] or 0.7 for r in rows],
+                importance_levels=[ImportanceLevel(r["importance_level"] or "medium") for r in rows],
+                created_at=[r["created_at"] for r in rows],
+                access_counts=[r["access_count"] or 0 for r in rows],
+                last_accessed=[r["last_accessed"] for r in rows],
+                now=now,
+            )
+            stored_weights = np.fromiter(
+                (r["decay_score"] if r["decay_score"] is not None else 1.0 for r in rows),
+                dtype=np.float64,
+                count=len(rows),
             )
             
-            # Update if changed significantly
-            if abs(current_weight - memory.metadata.decay_score) > 0.05:
-                await storage.update_memory_weight(memory.memory_id, current_weight)
-                updated_count += 1
+            # Update only those that changed significantly
+            changed = np.flatnonzero(np.abs(current_weights - stored_weights) > 0.05)
+            
+            # Written per batch so neither memory nor the UPDATE grows with the
+            # table; the cursor's snapshot doesn't see these writes
+            updated += await storage.bulk_update_memory_weights(
+                [(rows[idx]["memory_id"], float(current_weights[idx])) for idx in changed]
+            )
         
-        return updated_count
+        return updated
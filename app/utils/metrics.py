@@ -2,9 +2,10 @@
 
 import asyncio
 import logging
+import threading
 import time
 from contextlib import asynccontextmanager
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Any, Callable, Optional
 
 from prometheus_client import Counter, Gauge, Histogram, generate_latest
@@ -14,6 +15,16 @@ from app.config import get_settings
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# How often buffered counter increments are pushed into Prometheus
+COUNTER_FLUSH_INTERVAL_SECONDS = 1.0
+
+# Durations use the monotonic clock, immune to wall-clock (NTP) steps
+_now = time.monotonic
+
+
+# Latency buckets (seconds) for the request, embedding and LLM histograms;
+# fewer than the 15 client defaults, which keeps every labelled child small
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5)
 
 # Prometheus Metrics
 REQUEST_COUNT = Counter(
@@ -26,6 +37,7 @@ REQUEST_LATENCY = Histogram(
     "memory_api_request_duration_seconds",
     "API request latency",
     ["endpoint", "method"],
+    buckets=LATENCY_BUCKETS,
 )
 
 MEMORY_OPERATIONS = Counter(
@@ -49,13 +61,15 @@ MEMORY_COUNT = Gauge(
 EMBEDDING_GENERATION_TIME = Histogram(
     "embedding_generation_duration_seconds",
     "Time to generate embeddings",
-    ["batch_size"],
+    ["batch_size"],  # rounded up to a power of two
+    buckets=LATENCY_BUCKETS,
 )
 
 LLM_CALL_LATENCY = Histogram(
     "llm_call_duration_seconds",
     "LLM API call latency",
     ["model", "operation"],
+    buckets=LATENCY_BUCKETS,
 )
 
 LLM_TOKEN_USAGE = Counter(
@@ -77,12 +91,97 @@ CACHE_MISSES = Counter(
 )
 
 
+@lru_cache(maxsize=4096)
+def _child(metric, *label_values: str):
+    """Return the labelled child of a metric, cached per label tuple.
+    
+    Label values are positional, in the metric's label-name order.
+    """
+    return metric.labels(*label_values)
+
+
+def _noop(*args: Any, **kwargs: Any) -> None:
+    """Stand-in for record_* methods when metrics are disabled."""
+
+
+# MetricsCollector methods replaced by _noop when metrics are disabled
+_RECORDERS = (
+    "record_request",
+    "record_memory_operation",
+    "record_retrieval_latency",
+    "update_memory_count",
+    "record_embedding_time",
+    "record_llm_call",
+    "record_cache_hit",
+    "record_cache_miss",
+)
+
+
+class _LocalCounts:
+    """Per-thread running totals of buffered counter increments.
+    
+    Only the owning thread writes ``counts`` and only the flusher writes
+    ``flushed``, so neither side needs a lock: a flush pushes the difference
+    and anything incremented meanwhile goes out with the next one.
+    """
+
+    def __init__(self):
+        self.counts: dict[tuple, int] = {}
+        self.flushed: dict[tuple, int] = {}
+
+
 class MetricsCollector:
     """Collect and export application metrics."""
 
     def __init__(self):
         """Initialize metrics collector."""
         self.enabled = settings.enable_metrics
+        self._local = threading.local()
+        self._all_counts: list[_LocalCounts] = []
+        self._registry_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        # Disabled collectors get no-op recorders once, instead of every
+        # call checking self.enabled
+        if not self.enabled:
+            for name in _RECORDERS:
+                setattr(self, name, _noop)
+
+    def _count(self, metric: Counter, *label_values: str) -> None:
+        """Buffer a counter increment in the calling thread's totals."""
+        local = getattr(self._local, "counts", None)
+        if local is None:
+            local = self._local.counts = _LocalCounts()
+            with self._registry_lock:
+                self._all_counts.append(local)
+
+        key = (metric, *label_values)
+        local.counts[key] = local.counts.get(key, 0) + 1
+
+    def flush_counters(self) -> None:
+        """Push buffered counter increments from every thread into Prometheus."""
+        with self._registry_lock:
+            all_counts = list(self._all_counts)
+
+        with self._flush_lock:
+            for local in all_counts:
+                for key, total in list(local.counts.items()):
+                    delta = total - local.flushed.get(key, 0)
+                    if delta:
+                        _child(*key).inc(delta)
+                        local.flushed[key] = total
+
+    async def flush_periodically(
+        self,
+        interval: float = COUNTER_FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        """Flush buffered counters every ``interval`` seconds until cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                self.flush_counters()
+        finally:
+            self.flush_counters()
 
     def record_request(
         self,
@@ -92,19 +191,8 @@ class MetricsCollector:
         duration: float,
     ) -> None:
         """Record API request metrics."""
-        if not self.enabled:
-            return
-
-        REQUEST_COUNT.labels(
-            endpoint=endpoint,
-            method=method,
-            status=str(status),
-        ).inc()
-
-        REQUEST_LATENCY.labels(
-            endpoint=endpoint,
-            method=method,
-        ).observe(duration)
+        _child(REQUEST_COUNT, endpoint, method, str(status)).inc()
+        _child(REQUEST_LATENCY, endpoint, method).observe(duration)
 
     def record_memory_operation(
         self,
@@ -112,36 +200,21 @@ class MetricsCollector:
         status: str = "success",
     ) -> None:
         """Record memory operation."""
-        if not self.enabled:
-            return
-
-        MEMORY_OPERATIONS.labels(
-            operation=operation,
-            status=status,
-        ).inc()
+        self._count(MEMORY_OPERATIONS, operation, status)
 
     def record_retrieval_latency(self, duration_ms: float) -> None:
         """Record memory retrieval latency."""
-        if not self.enabled:
-            return
-
         MEMORY_RETRIEVAL_LATENCY.observe(duration_ms)
 
     def update_memory_count(self, user_id: str, count: int) -> None:
         """Update total memory count for user."""
-        if not self.enabled:
-            return
-
         MEMORY_COUNT.labels(user_id=user_id).set(count)
 
     def record_embedding_time(self, duration: float, batch_size: int) -> None:
         """Record embedding generation time."""
-        if not self.enabled:
-            return
-
-        EMBEDDING_GENERATION_TIME.labels(
-            batch_size=str(batch_size),
-        ).observe(duration)
+        # Power-of-two buckets keep the batch_size label to a handful of series
+        size_bucket = 1 << (max(batch_size, 1) - 1).bit_length()
+        _child(EMBEDDING_GENERATION_TIME, str(size_bucket)).observe(duration)
 
     def record_llm_call(
         self,
@@ -152,42 +225,25 @@ class MetricsCollector:
         completion_tokens: int = 0,
     ) -> None:
         """Record LLM API call metrics."""
-        if not self.enabled:
-            return
-
-        LLM_CALL_LATENCY.labels(
-            model=model,
-            operation=operation,
-        ).observe(duration)
+        _child(LLM_CALL_LATENCY, model, operation).observe(duration)
 
         if prompt_tokens > 0:
-            LLM_TOKEN_USAGE.labels(
-                model=model,
-                type="prompt",
-            ).inc(prompt_tokens)
+            _child(LLM_TOKEN_USAGE, model, "prompt").inc(prompt_tokens)
 
         if completion_tokens > 0:
-            LLM_TOKEN_USAGE.labels(
-                model=model,
-                type="completion",
-            ).inc(completion_tokens)
+            _child(LLM_TOKEN_USAGE, model, "completion").inc(completion_tokens)
 
     def record_cache_hit(self, cache_type: str) -> None:
         """Record cache hit."""
-        if not self.enabled:
-            return
-
-        CACHE_HITS.labels(cache_type=cache_type).inc()
+        self._count(CACHE_HITS, cache_type)
 
     def record_cache_miss(self, cache_type: str) -> None:
         """Record cache miss."""
-        if not self.enabled:
-            return
-
-        CACHE_MISSES.labels(cache_type=cache_type).inc()
+        self._count(CACHE_MISSES, cache_type)
 
     def export_metrics(self) -> bytes:
         """Export metrics in Prometheus format."""
+        self.flush_counters()
         return generate_latest()
 
 
@@ -202,36 +258,41 @@ def track_time(operation: str) -> Callable:
         operation: Name of the operation being tracked
     """
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
-            start_time = time.time()
-            try:
-                result = await func(*args, **kwargs)
-                metrics.record_memory_operation(operation, "success")
-                return result
-            except Exception as e:
-                metrics.record_memory_operation(operation, "error")
-                raise
-            finally:
-                duration = time.time() - start_time
-                logger.debug(f"{operation} took {duration:.3f}s")
+        # Bound once per decorated function so each call reads closure
+        # cells instead of looking up module globals and attributes
+        now = _now
+        record = metrics.record_memory_operation
+        debug = logger.debug
+
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                start_time = now()
+                try:
+                    result = await func(*args, **kwargs)
+                    record(operation, "success")
+                    return result
+                except Exception:
+                    record(operation, "error")
+                    raise
+                finally:
+                    debug("%s took %.3fs", operation, now() - start_time)
+
+            return async_wrapper
 
         @wraps(func)
         def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
-            start_time = time.time()
+            start_time = now()
             try:
                 result = func(*args, **kwargs)
-                metrics.record_memory_operation(operation, "success")
+                record(operation, "success")
                 return result
-            except Exception as e:
-                metrics.record_memory_operation(operation, "error")
+            except Exception:
+                record(operation, "error")
                 raise
             finally:
-                duration = time.time() - start_time
-                logger.debug(f"{operation} took {duration:.3f}s")
+                debug("%s took %.3fs", operation, now() - start_time)
 
-        if asyncio.iscoroutinefunction(func):
-            return async_wrapper
         return sync_wrapper
 
     return decorator
@@ -247,13 +308,13 @@ async def track_latency(operation: str):
     Yields:
         Dictionary to store timing info
     """
-    start_time = time.time()
+    start_time = _now()
     timing_info = {"start": start_time}
     
     try:
         yield timing_info
     finally:
-        duration = time.time() - start_time
+        duration = _now() - start_time
         timing_info["duration"] = duration
         timing_info["duration_ms"] = duration * 1000
-        logger.debug(f"{operation} latency: {duration * 1000:.2f}ms")
+        logger.debug("%s latency: %.2fms", operation, timing_info["duration_ms"])
@@ -1,9 +1,134 @@
 """Temporal awareness utilities for memory system."""
 
+import calendar
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache, partial
 from typing import Optional, Tuple
 
+# All relative date phrases in one alternation, so the text is scanned once;
+# the named group that matched selects the (offset, unit) below
+_TEMPORAL_RE = re.compile(
+    r'\b(?:'
+    r'(?P<tomorrow>tomorrow)'
+    r'|(?P<today>today)'
+    r'|(?P<yesterday>yesterday)'
+    r'|(?P<next_week>next week)'
+    r'|(?P<next_month>next month)'
+    r'|in (?P<n_days>\d+) days?'
+    r'|in (?P<n_weeks>\d+) weeks?'
+    r'|in (?P<n_months>\d+) months?'
+    r')\b',
+    re.IGNORECASE
+)
+
+# Texts that can't contain a phrase above skip the regex: the fixed phrases
+# appear verbatim, and the "in N ..." ones need a unit word and a digit
+_STATIC_HINTS = ("today", "tomorrow", "yesterday", "next week", "next month")
+_NUMERIC_HINTS = ("day", "week", "month")
+_DIGIT_RE = re.compile(r'\d')
+
+# Offset per matched group; None means the group captured the number
+_TEMPORAL_OFFSETS = {
+    'tomorrow': (1, 'day'),
+    'today': (0, 'day'),
+    'yesterday': (-1, 'day'),
+    'next_week': (7, 'day'),
+    'next_month': (1, 'month'),
+    'n_days': (None, 'day'),
+    'n_weeks': (None, 'week'),
+    'n_months': (None, 'month'),
+}
+
+# Time of day (e.g., "at 3pm", "at 15:00")
+_TIME_RE = re.compile(r'at (\d{1,2})(?::(\d{2}))?\s*(am|pm)?', re.IGNORECASE)
+
+# Stored dates in format (Month Day, Year at HH:MM AM/PM)
+_STORED_DATE_RE = re.compile(r'\(([A-Za-z]+) (\d+), (\d{4})(?: at (\d{1,2}):(\d{2}) (AM|PM))?\)')
+
+# Relative descriptions for dates within a week of today
+_RELATIVE_DAYS = {
+    0: "today",
+    1: "tomorrow",
+    -1: "yesterday",
+    **{diff: f"in {diff} days" for diff in range(2, 8)},
+    **{-diff: f"{diff} days ago" for diff in range(2, 8)},
+}
+
+_MONTHS = {
+    'January': 1, 'February': 2, 'March': 3, 'April': 4,
+    'May': 5, 'June': 6, 'July': 7, 'August': 8,
+    'September': 9, 'October': 10, 'November': 11, 'December': 12
+}
+
+
+def _add_months(value: date, months: int) -> date:
+    """Move a date by whole calendar months, clamping to the month's last day."""
+    year, month_index = divmod(value.month - 1 + months, 12)
+    year += value.year
+    month = month_index + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+@lru_cache(maxsize=4096)
+def _parse_temporal_cached(
+    text: str,
+    reference_day: date
+) -> Tuple[str, Optional[date], Optional[time]]:
+    """Resolve the temporal phrase in text against a reference day.
+    
+    Depends only on the day, not the time of day, so repeated phrases are
+    served from the cache for the whole day.
+    
+    Returns:
+        Tuple of (enhanced_text, target_day, target_time); target_time is
+        None when the text gives no time of day
+    """
+    match = _TEMPORAL_RE.search(text)
+    if not match:
+        return text, None, None
+    
+    # Calculate actual date
+    offset, unit = _TEMPORAL_OFFSETS[match.lastgroup]
+    if offset is None:
+        # Extract number from text
+        offset = int(match.group(match.lastgroup))
+    
+    if unit == 'day':
+        target_day = reference_day + timedelta(days=offset)
+    elif unit == 'week':
+        target_day = reference_day + timedelta(weeks=offset)
+    elif unit == 'month':
+        target_day = _add_months(reference_day, offset)
+    else:
+        target_day = reference_day
+    
+    # Extract time if present (e.g., "at 3pm", "at 15:00")
+    target_time = None
+    time_match = _TIME_RE.search(text)
+    if time_match:
+        hour = int(time_match.group(1))
+        minute = int(time_match.group(2)) if time_match.group(2) else 0
+        meridiem = time_match.group(3)
+        
+        if meridiem:
+            if meridiem.lower() == 'pm' and hour < 12:
+                hour += 12
+            elif meridiem.lower() == 'am' and hour == 12:
+                hour = 0
+        
+        target_time = time(hour, minute)
+        absolute = datetime.combine(target_day, target_time).strftime("%B %d, %Y at %I:%M %p")
+    else:
+        absolute = target_day.strftime("%B %d, %Y")
+    
+    # Annotate the relative term in place with the absolute date
+    end = match.end()
+    enhanced_text = f"{text[:end]} ({absolute}){text[end:]}"
+    
+    return enhanced_text, target_day, target_time
+
 
 def parse_temporal_reference(
     text: str,
@@ -22,82 +147,69 @@ def parse_temporal_reference(
     if reference_date is None:
         reference_date = datetime.utcnow()
     
-    enhanced_text = text
-    extracted_datetime = None
-    
-    # Define patterns and their replacements
-    patterns = [
-        # Tomorrow
-        (r'\btomorrow\b', 1, 'day'),
-        # Today
-        (r'\btoday\b', 0, 'day'),
-        # Yesterday  
-        (r'\byesterday\b', -1, 'day'),
-        # Next week
-        (r'\bnext week\b', 7, 'day'),
-        # Next month
-        (r'\bnext month\b', 1, 'month'),
-        # In X days
-        (r'\bin (\d+) days?\b', None, 'day'),
-        # In X weeks
-        (r'\bin (\d+) weeks?\b', None, 'week'),
-        # In X months
-        (r'\bin (\d+) months?\b', None, 'month'),
-    ]
-    
-    for pattern, offset, unit in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            # Calculate actual date
-            if offset is None:
-                # Extract number from text
-                offset = int(match.group(1))
-            
-            if unit == 'day':
-                target_date = reference_date + timedelta(days=offset)
-            elif unit == 'week':
-                target_date = reference_date + timedelta(weeks=offset)
-            elif unit == 'month':
-                target_date = reference_date + timedelta(days=offset * 30)
-            else:
-                target_date = reference_date
-            
-            # Extract time if present (e.g., "at 3pm", "at 15:00")
-            time_match = re.search(r'at (\d{1,2})(?::(\d{2}))?\s*(am|pm)?', text, re.IGNORECASE)
-            if time_match:
-                hour = int(time_match.group(1))
-                minute = int(time_match.group(2)) if time_match.group(2) else 0
-                meridiem = time_match.group(3)
-                
-                if meridiem:
-                    if meridiem.lower() == 'pm' and hour < 12:
-                        hour += 12
-                    elif meridiem.lower() == 'am' and hour == 12:
-                        hour = 0
-                
-                target_date = target_date.replace(hour=hour, minute=minute, second=0)
-                extracted_datetime = target_date
+    # Most conversation turns have no temporal phrase; plain substring checks
+    # rule that out far more cheaply than the regex (and keep them out of the cache)
+    text_lower = text.lower()
+    if not (
+        any(hint in text_lower for hint in _STATIC_HINTS)
+        or (any(hint in text_lower for hint in _NUMERIC_HINTS) and _DIGIT_RE.search(text))
+    ):
+        return text, None
+    
+    enhanced_text, target_day, target_time = _parse_temporal_cached(text, reference_date.date())
+    if target_day is None:
+        return text, None
+    
+    # Without an explicit time the target keeps the reference time of day
+    if target_time is None:
+        target_time = reference_date.time()
+    
+    return enhanced_text, datetime.combine(target_day, target_time, tzinfo=reference_date.tzinfo)
+
+
+def _relative_stored_date(match: re.Match, today: date) -> str:
+    """Rewrite one stored (Month Day, Year [at HH:MM AM/PM]) date relative to today.
+    
+    Invalid dates are returned unchanged.
+    """
+    month_name = match.group(1)
+    day = int(match.group(2))
+    year = int(match.group(3))
+    
+    # Parse the stored date
+    month = _MONTHS.get(month_name, 1)
+    
+    try:
+        # Calculate difference in whole days
+        diff = (date(year, month, day) - today).days
+        
+        # Generate relative description
+        relative = _RELATIVE_DAYS.get(diff)
+        if relative is None:
+            weeks = diff // 7
+            if diff > 7:
+                relative = f"in {weeks} week{'s' if weeks > 1 else ''}"
             else:
-                extracted_datetime = target_date
-            
-            # Enhance text with absolute date
-            date_str = target_date.strftime("%B %d, %Y")
-            time_str = ""
-            
-            if time_match:
-                time_str = f" at {target_date.strftime('%I:%M %p')}"
+                relative = f"{abs(weeks)} week{'s' if abs(weeks) > 1 else ''} ago"
+        
+        # Add time if available
+        time_str = ""
+        if match.group(4):
+            hour = int(match.group(4))
+            minute = int(match.group(5))
+            meridiem = match.group(6)
             
-            # Replace relative term with absolute date
-            enhanced_text = re.sub(
-                pattern,
-                f"{match.group(0)} ({date_str}{time_str})",
-                enhanced_text,
-                flags=re.IGNORECASE
-            )
+            if meridiem == 'PM' and hour < 12:
+                hour += 12
+            elif meridiem == 'AM' and hour == 12:
+                hour = 0
             
-            break  # Only process first match
+            time_str = f" at {time(hour, minute).strftime('%I:%M %p')}"
+    except ValueError:
+        # Invalid date, leave it as written
+        return match.group(0)
     
-    return enhanced_text, extracted_datetime
+    return f"({relative}{time_str} - originally on {month_name} {day})"
 
 
 def format_relative_time(memory_content: str, memory_timestamp: datetime) -> str:
@@ -111,74 +223,13 @@ def format_relative_time(memory_content: str, memory_timestamp: datetime) -> str
     Returns:
         Enhanced content with updated relative times
     """
-    now = datetime.utcnow()
-    
-    # Extract stored dates in format (Month Day, Year at HH:MM AM/PM)
-    date_pattern = r'\(([A-Za-z]+) (\d+), (\d{4})(?: at (\d{1,2}):(\d{2}) (AM|PM))?\)'
-    matches = re.finditer(date_pattern, memory_content)
+    today = datetime.utcnow().date()
     
-    enhanced_content = memory_content
-    
-    for match in matches:
-        month_name = match.group(1)
-        day = int(match.group(2))
-        year = int(match.group(3))
-        
-        # Parse the stored date
-        month_map = {
-            'January': 1, 'February': 2, 'March': 3, 'April': 4,
-            'May': 5, 'June': 6, 'July': 7, 'August': 8,
-            'September': 9, 'October': 10, 'November': 11, 'December': 12
-        }
-        month = month_map.get(month_name, 1)
-        
-        hour = int(match.group(4)) if match.group(4) else 0
-        minute = int(match.group(5)) if match.group(5) else 0
-        meridiem = match.group(6)
-        
-        if meridiem == 'PM' and hour < 12:
-            hour += 12
-        elif meridiem == 'AM' and hour == 12:
-            hour = 0
-        
-        try:
-            stored_date = datetime(year, month, day, hour, minute)
-            
-            # Calculate difference
-            diff = (stored_date.date() - now.date()).days
-            
-            # Generate relative description
-            if diff == 0:
-                relative = "today"
-            elif diff == 1:
-                relative = "tomorrow"
-            elif diff == -1:
-                relative = "yesterday"
-            elif diff > 1 and diff <= 7:
-                relative = f"in {diff} days"
-            elif diff < -1 and diff >= -7:
-                relative = f"{abs(diff)} days ago"
-            elif diff > 7:
-                weeks = diff // 7
-                relative = f"in {weeks} week{'s' if weeks > 1 else ''}"
-            else:
-                relative = f"{abs(diff // 7)} week{'s' if abs(diff // 7) > 1 else ''} ago"
-            
-            # Add time if available
-            time_str = ""
-            if match.group(4):
-                time_str = f" at {stored_date.strftime('%I:%M %p')}"
-            
-            # Replace the parenthetical date with relative time
-            enhanced_content = enhanced_content.replace(
-                match.group(0),
-                f"({relative}{time_str} - originally on {month_name} {day})"
-            )
-        except ValueError:
-            # Invalid date, skip
-            continue
-    
-    return enhanced_content
+    # Replace each stored date with its relative form in a single pass
+    return _STORED_DATE_RE.sub(
+        partial(_relative_stored_date, today=today),
+        memory_content
+    )
 
 
 def extract_schedule_date(text: str) -> Optional[datetime]:
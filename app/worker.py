@@ -1,9 +1,21 @@
 """Celery worker configuration for async tasks."""
 
+import asyncio
 import logging
+import threading
+from typing import Optional
+
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
+from sqlalchemy import text
 
 from app.config import get_settings
+from app.database import db_manager
+from app.services.extractor import MemoryExtractor
+from app.services.memory_manager import MemoryManager
+from app.services.retriever import MemoryRetriever
+from app.services.storage import MemoryStorage
+from app.utils.embeddings import EmbeddingGenerator
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -30,6 +42,68 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+# cleanup_old_memories streams user ids in batches of this size and enqueues
+# their optimize tasks in chunks of OPTIMIZE_CHUNK_SIZE per message
+CLEANUP_SCAN_BATCH_SIZE = 500
+OPTIMIZE_CHUNK_SIZE = 100
+
+# One event loop per worker process. The database connections are bound to
+# it, so they are opened once and reused by every task the process runs.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Prefork runs one task at a time per process, but the threads pool does not;
+# a loop can only run_until_complete one coroutine at a time
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Return the worker's event loop, connecting the databases on first use.
+
+    The loop is only kept once the databases are connected; if that fails it
+    is discarded, so the next task retries instead of running unconnected.
+    """
+    global _loop
+    if _loop is None:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(db_manager.initialize())
+        except Exception:
+            try:
+                loop.run_until_complete(db_manager.close())
+            except Exception as e:
+                logger.warning(f"Failed to close partial database connections: {e}")
+            loop.close()
+            raise
+        _loop = loop
+    return _loop
+
+
+def _run(coro):
+    """Run a task coroutine on the worker's event loop."""
+    with _loop_lock:
+        return _get_loop().run_until_complete(coro)
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    """Connect the databases as soon as a pool process starts."""
+    with _loop_lock:
+        _get_loop()
+
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    """Close the shared connections and the loop when a pool process exits."""
+    global _loop
+    if _loop is None:
+        return
+
+    try:
+        _loop.run_until_complete(db_manager.close())
+    finally:
+        _loop.close()
+        _loop = None
+
 
 @celery_app.task(name="extract_memories")
 def extract_memories_task(
@@ -46,38 +120,27 @@ def extract_memories_task(
         user_message: User's message
         assistant_message: Assistant's response
     """
-    import asyncio
-    from app.database import db_manager
-    from app.services.extractor import MemoryExtractor
-    from app.services.storage import MemoryStorage
-    from app.utils.embeddings import EmbeddingGenerator
 
     async def _extract():
-        await db_manager.initialize()
+        extractor = MemoryExtractor()
+        embedder = EmbeddingGenerator(db_manager.redis)
         
-        try:
-            extractor = MemoryExtractor()
-            embedder = EmbeddingGenerator(db_manager.redis)
+        async with db_manager.get_session() as session:
+            storage = MemoryStorage(session, db_manager.redis, embedder)
             
-            async with db_manager.get_session() as session:
-                storage = MemoryStorage(session, db_manager.redis, embedder)
-                
-                memories = await extractor.extract_from_turn(
-                    user_id=user_id,
-                    turn_number=turn_number,
-                    user_message=user_message,
-                    assistant_message=assistant_message,
-                )
-                
-                for memory_create in memories:
-                    await storage.create_memory(memory_create)
-                
-                logger.info(f"Extracted {len(memories)} memories for turn {turn_number}")
-                return len(memories)
-        finally:
-            await db_manager.close()
+            memories = await extractor.extract_from_turn(
+                user_id=user_id,
+                turn_number=turn_number,
+                user_message=user_message,
+                assistant_message=assistant_message,
+            )
+            
+            await storage.bulk_create_memories(memories)
+            
+            logger.info(f"Extracted {len(memories)} memories for turn {turn_number}")
+            return len(memories)
 
-    return asyncio.run(_extract())
+    return _run(_extract())
 
 
 @celery_app.task(name="consolidate_user_memories")
@@ -87,33 +150,21 @@ def consolidate_user_memories_task(user_id: str):
     Args:
         user_id: User ID
     """
-    import asyncio
-    from app.database import db_manager
-    from app.services.extractor import MemoryExtractor
-    from app.services.memory_manager import MemoryManager
-    from app.services.retriever import MemoryRetriever
-    from app.services.storage import MemoryStorage
-    from app.utils.embeddings import EmbeddingGenerator
 
     async def _consolidate():
-        await db_manager.initialize()
+        embedder = EmbeddingGenerator(db_manager.redis)
+        extractor = MemoryExtractor()
+        retriever = MemoryRetriever(db_manager.redis, embedder)
         
-        try:
-            embedder = EmbeddingGenerator(db_manager.redis)
-            extractor = MemoryExtractor()
-            retriever = MemoryRetriever(db_manager.redis, embedder)
+        async with db_manager.get_session() as session:
+            storage = MemoryStorage(session, db_manager.redis, embedder)
+            manager = MemoryManager(storage, retriever, extractor)
             
-            async with db_manager.get_session() as session:
-                storage = MemoryStorage(session, db_manager.redis, embedder)
-                manager = MemoryManager(storage, retriever, extractor)
-                
-                consolidations = await manager.consolidate_similar_memories(user_id)
-                logger.info(f"Consolidated {len(consolidations)} memory clusters")
-                return len(consolidations)
-        finally:
-            await db_manager.close()
+            consolidations = await manager.consolidate_similar_memories(user_id)
+            logger.info(f"Consolidated {len(consolidations)} memory clusters")
+            return len(consolidations)
 
-    return asyncio.run(_consolidate())
+    return _run(_consolidate())
 
 
 @celery_app.task(name="optimize_user_memories")
@@ -124,65 +175,48 @@ def optimize_user_memories_task(user_id: str, current_turn: int):
         user_id: User ID
         current_turn: Current conversation turn
     """
-    import asyncio
-    from app.database import db_manager
-    from app.services.extractor import MemoryExtractor
-    from app.services.memory_manager import MemoryManager
-    from app.services.retriever import MemoryRetriever
-    from app.services.storage import MemoryStorage
-    from app.utils.embeddings import EmbeddingGenerator
 
     async def _optimize():
-        await db_manager.initialize()
+        embedder = EmbeddingGenerator(db_manager.redis)
+        extractor = MemoryExtractor()
+        retriever = MemoryRetriever(db_manager.redis, embedder)
         
-        try:
-            embedder = EmbeddingGenerator(db_manager.redis)
-            extractor = MemoryExtractor()
-            retriever = MemoryRetriever(db_manager.redis, embedder)
+        async with db_manager.get_session() as session:
+            storage = MemoryStorage(session, db_manager.redis, embedder)
+            manager = MemoryManager(storage, retriever, extractor)
             
-            async with db_manager.get_session() as session:
-                storage = MemoryStorage(session, db_manager.redis, embedder)
-                manager = MemoryManager(storage, retriever, extractor)
-                
-                results = await manager.optimize_memory_store(user_id, current_turn)
-                logger.info(f"Optimized memory store: {results}")
-                return results
-        finally:
-            await db_manager.close()
+            results = await manager.optimize_memory_store(user_id, current_turn)
+            logger.info(f"Optimized memory store: {results}")
+            return results
 
-    return asyncio.run(_optimize())
+    return _run(_optimize())
 
 
 @celery_app.task(name="cleanup_old_memories")
 def cleanup_old_memories_task():
     """Periodic task to cleanup old memories across all users."""
-    import asyncio
-    from sqlalchemy import text
-    from app.database import db_manager
 
     async def _cleanup():
-        await db_manager.initialize()
+        scheduled = 0
         
-        try:
-            # Get list of active users
-            async with db_manager.get_session() as session:
-                result = await session.execute(
-                    text("SELECT DISTINCT user_id FROM memories")
+        # Stream active users and enqueue an optimize task per user, one
+        # broker message per OPTIMIZE_CHUNK_SIZE users
+        async with db_manager.get_session() as session:
+            result = await session.stream(
+                text("SELECT DISTINCT user_id FROM memories").execution_options(
+                    yield_per=CLEANUP_SCAN_BATCH_SIZE
                 )
-                user_ids = [row[0] for row in result.fetchall()]
-            
-            # Cleanup each user (in production, use task queue)
-            total_cleaned = 0
-            for user_id in user_ids:
-                # Call optimize task for each user
-                optimize_user_memories_task.delay(user_id, 0)
-            
-            logger.info(f"Scheduled cleanup for {len(user_ids)} users")
-            return len(user_ids)
-        finally:
-            await db_manager.close()
+            )
+            async for rows in result.scalars().partitions(CLEANUP_SCAN_BATCH_SIZE):
+                optimize_user_memories_task.chunks(
+                    [(user_id, 0) for user_id in rows], OPTIMIZE_CHUNK_SIZE
+                ).apply_async()
+                scheduled += len(rows)
+        
+        logger.info(f"Scheduled cleanup for {scheduled} users")
+        return scheduled
 
-    return asyncio.run(_cleanup())
+    return _run(_cleanup())
 
 
 # Periodic task schedule
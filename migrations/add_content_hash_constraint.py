@@ -1,35 +1,176 @@
 """Add unique constraint on (user_id, content_hash) to prevent duplicate memories.
 
 This migration creates a content_hash column and adds a unique constraint
-to prevent storing identical memories for the same user.
+to prevent storing identical memories for the same user. The hash is the
+first 8 bytes of SHA256 as a signed BIGINT: computable both in PostgreSQL
+and in Python, and an 8-byte index key instead of 64 hex characters.
 
 Run: python -m migrations.add_content_hash_constraint
+     python -m migrations.add_content_hash_constraint --exact-hash
+       (hash in Python with str.lower().strip(), for content whose Unicode
+       case/whitespace handling must match the application exactly)
 """
 
 import asyncio
 import hashlib
 import logging
 from sqlalchemy import text
-from app.database import db_manager
+from app.database import create_index_concurrently, db_manager
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def hash_content(content: str) -> str:
-    """Generate SHA256 hash of content for deduplication.
+# 64-bit SHA256 prefix of the lowercased, whitespace-trimmed content, computed
+# by PostgreSQL itself (built-in sha256(), no pgcrypto needed) in one statement
+_POPULATE_CONTENT_HASH_SQL = text(r"""
+    UPDATE memories
+    SET content_hash = CAST(CAST(
+        'x' || encode(substring(
+            sha256(convert_to(lower(btrim(content, E' \t\n\r\f\x0b')), 'UTF8'))
+            FROM 1 FOR 8
+        ), 'hex')
+    AS bit(64)) AS bigint)
+    WHERE content_hash IS NULL
+""")
+
+# Databases migrated before the BIGINT switch hold 64-char SHA256 hex; its
+# first 16 hex digits are exactly the new value
+_CONVERT_HEX_HASH_SQL = text("""
+    ALTER TABLE memories
+    ALTER COLUMN content_hash TYPE BIGINT
+    USING CAST(CAST('x' || substr(content_hash, 1, 16) AS bit(64)) AS bigint)
+""")
+
+# Rows hashed in Python per UPDATE statement / transaction in --exact-hash mode
+EXACT_HASH_BATCH_SIZE = 10_000
+
+_SET_CONTENT_HASHES_SQL = text("""
+    UPDATE memories
+    SET content_hash = data.content_hash
+    FROM (
+        SELECT unnest(CAST(:memory_ids AS uuid[])) AS memory_id,
+               unnest(CAST(:hashes AS bigint[])) AS content_hash
+    ) AS data
+    WHERE memories.memory_id = data.memory_id
+""")
+
+# Every row but the first of each (user_id, content_hash) group, found in a
+# single sort pass instead of a self-join
+_DUPLICATE_IDS_SQL = text("""
+    SELECT memory_id
+    FROM (
+        SELECT memory_id,
+               row_number() OVER (
+                   PARTITION BY user_id, content_hash ORDER BY memory_id
+               ) AS rn
+        FROM memories
+        WHERE content_hash IS NOT NULL
+    ) AS ranked
+    WHERE rn > 1
+""")
+
+# Duplicates deleted per statement / transaction, keeping lock time bounded
+DUPLICATE_DELETE_BATCH_SIZE = 10_000
+
+_DELETE_MEMORIES_SQL = text("""
+    DELETE FROM memories WHERE memory_id = ANY(CAST(:memory_ids AS uuid[]))
+""")
+
+# Exactly the ASCII characters str.strip() removes, so the bytes fast path
+# below normalises ASCII content identically
+_ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+
+def hash_content(content: str) -> int:
+    """Generate a 64-bit content hash for deduplication.
     
     Args:
         content: Memory content text
         
     Returns:
-        Hex digest of SHA256 hash
+        First 8 bytes of the SHA256 digest as a signed BIGINT
     """
-    return hashlib.sha256(content.lower().strip().encode('utf-8')).hexdigest()
+    if content.isascii():
+        normalized = content.encode('ascii').strip(_ASCII_WHITESPACE).lower()
+    else:
+        normalized = content.lower().strip().encode('utf-8')
+    digest = hashlib.sha256(normalized).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
 
 
-async def migrate():
-    """Add content_hash column and unique constraint."""
+async def populate_hashes_in_python(session) -> int:
+    """Hash content in Python and write the hashes back in batched UPDATEs.
+    
+    Rows are streamed through a server-side cursor on ``session`` so only one
+    batch of content is held in memory; writes go through a second session so
+    each batch can commit without closing the cursor.
+    
+    Args:
+        session: Database session to read from
+        
+    Returns:
+        Number of memories hashed
+    """
+    # Cheap thanks to the partial index on unhashed rows
+    total = await session.scalar(
+        text("SELECT count(*) FROM memories WHERE content_hash IS NULL")
+    )
+    logger.info("Found %d memories without content_hash", total)
+    
+    result = await session.stream(
+        text("""
+            SELECT memory_id, content FROM memories WHERE content_hash IS NULL
+        """).execution_options(yield_per=EXACT_HASH_BATCH_SIZE)
+    )
+    
+    populated = 0
+    async with db_manager.get_session() as writer:
+        # One UNNEST update and one commit per batch instead of per row
+        async for batch in result.partitions(EXACT_HASH_BATCH_SIZE):
+            await writer.execute(
+                _SET_CONTENT_HASHES_SQL,
+                {
+                    # asyncpg returns and binds uuid.UUID natively
+                    "memory_ids": [memory_id for memory_id, _ in batch],
+                    "hashes": [hash_content(content) for _, content in batch],
+                }
+            )
+            await writer.commit()
+            populated += len(batch)
+            logger.info("Progress: %d/%d memories hashed", populated, total)
+    
+    await session.commit()
+    return populated
+
+
+async def delete_duplicates(session) -> int:
+    """Delete duplicate memories by primary key in committed batches.
+    
+    Args:
+        session: Database session
+        
+    Returns:
+        Number of memories deleted
+    """
+    duplicate_ids = (await session.scalars(_DUPLICATE_IDS_SQL)).all()
+    for start in range(0, len(duplicate_ids), DUPLICATE_DELETE_BATCH_SIZE):
+        batch = duplicate_ids[start:start + DUPLICATE_DELETE_BATCH_SIZE]
+        await session.execute(_DELETE_MEMORIES_SQL, {"memory_ids": batch})
+        await session.commit()
+        logger.info(
+            "Progress: %d/%d duplicates deleted",
+            start + len(batch), len(duplicate_ids),
+        )
+    return len(duplicate_ids)
+
+
+async def migrate(exact_hash: bool = False):
+    """Add content_hash column and unique constraint.
+    
+    Args:
+        exact_hash: Hash in Python instead of in PostgreSQL
+    """
     logger.info("Starting migration: add_content_hash_constraint")
     
     async with db_manager.get_session() as session:
@@ -38,54 +179,56 @@ async def migrate():
             logger.info("Adding content_hash column...")
             await session.execute(text("""
                 ALTER TABLE memories 
-                ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)
+                ADD COLUMN IF NOT EXISTS content_hash BIGINT
+            """))
+            column_type = await session.scalar(text("""
+                SELECT data_type FROM information_schema.columns
+                WHERE table_name = 'memories' AND column_name = 'content_hash'
             """))
+            if column_type != "bigint":
+                await session.execute(_CONVERT_HEX_HASH_SQL)
             await session.commit()
             logger.info("✅ content_hash column added")
             
+            # Partial index over unhashed rows only: nearly empty once the
+            # table is populated, so re-runs find the NULL rows without a
+            # sequential scan. Kept permanently, as later inserts may lack
+            # a hash until the next run.
+            async with db_manager._engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await create_index_concurrently(conn, "idx_memories_content_hash_null", """
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_content_hash_null
+                    ON memories(memory_id) WHERE content_hash IS NULL
+                """)
+            
             # Step 2: Populate content_hash for existing memories
             logger.info("Populating content_hash for existing memories...")
-            result = await session.execute(text("""
-                SELECT memory_id, content FROM memories WHERE content_hash IS NULL
-            """))
-            rows = result.fetchall()
-            
-            logger.info(f"Found {len(rows)} memories without content_hash")
-            
-            for memory_id, content in rows:
-                content_hash = hash_content(content)
-                await session.execute(
-                    text("""
-                        UPDATE memories 
-                        SET content_hash = :hash 
-                        WHERE memory_id = :id
-                    """),
-                    {"hash": content_hash, "id": str(memory_id)}
-                )
-            
-            await session.commit()
-            logger.info(f"✅ Populated content_hash for {len(rows)} memories")
+            if exact_hash:
+                populated = await populate_hashes_in_python(session)
+            else:
+                result = await session.execute(_POPULATE_CONTENT_HASH_SQL)
+                await session.commit()
+                populated = result.rowcount
+            logger.info(f"✅ Populated content_hash for {populated} memories")
             
             # Step 3: Create unique index (prevents duplicate inserts)
             logger.info("Creating unique index on (user_id, content_hash)...")
             
             # Drop existing duplicates before adding constraint
-            await session.execute(text("""
-                DELETE FROM memories m1
-                USING memories m2
-                WHERE m1.memory_id > m2.memory_id
-                  AND m1.user_id = m2.user_id
-                  AND m1.content_hash = m2.content_hash
-            """))
-            await session.commit()
-            logger.info("✅ Removed duplicate memories")
+            removed = await delete_duplicates(session)
+            logger.info(f"✅ Removed {removed} duplicate memories")
             
-            # Add unique constraint
-            await session.execute(text("""
-                CREATE UNIQUE INDEX IF NOT EXISTS idx_memories_user_content_hash
-                ON memories(user_id, content_hash)
-            """))
+            # Add unique constraint, built concurrently (outside any
+            # transaction) so inserts keep flowing during the build
             await session.commit()
+            async with db_manager._engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                # A duplicate inserted since delete_duplicates fails the build;
+                # the invalid index is dropped and the migration raises
+                await create_index_concurrently(conn, "idx_memories_user_content_hash", """
+                    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_user_content_hash
+                    ON memories(user_id, content_hash)
+                """)
             logger.info("✅ Unique index created")
             
             logger.info("Migration completed successfully!")
@@ -105,6 +248,9 @@ async def rollback():
             await session.execute(text("""
                 DROP INDEX IF EXISTS idx_memories_user_content_hash
             """))
+            await session.execute(text("""
+                DROP INDEX IF EXISTS idx_memories_content_hash_null
+            """))
             await session.execute(text("""
                 ALTER TABLE memories DROP COLUMN IF EXISTS content_hash
             """))
@@ -123,4 +269,4 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "rollback":
         asyncio.run(rollback())
     else:
-        asyncio.run(migrate())
+        asyncio.run(migrate(exact_hash="--exact-hash" in sys.argv[1:]))
@@ -0,0 +1,70 @@
+"""Add an HNSW index on memories.embedding for approximate nearest-neighbour search.
+
+The index is built with CREATE INDEX CONCURRENTLY so writes are not blocked,
+which means it must run outside a transaction. Run it after bulk loads:
+building HNSW on a populated table is much faster than maintaining it
+row by row during the load. The column must already be halfvec; older
+vector(384) tables get the index from convert_embedding_to_halfvec.
+
+Run: python -m migrations.add_embedding_hnsw_index
+"""
+
+import asyncio
+import logging
+from sqlalchemy import text
+from app.database import create_index_concurrently, db_manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def migrate():
+    """Create the HNSW index on the embedding column."""
+    logger.info("Starting migration: add_embedding_hnsw_index")
+    await db_manager._init_postgres()
+
+    try:
+        async with db_manager._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            # Cosine distance matches the metric used by the Pinecone index
+            await create_index_concurrently(conn, "idx_memories_embedding_hnsw", """
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_embedding_hnsw
+                ON memories USING hnsw (embedding halfvec_cosine_ops)
+                WITH (m = 16, ef_construction = 64)
+            """)
+        logger.info("✅ HNSW index created")
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        raise
+    finally:
+        await db_manager.close()
+
+
+async def rollback():
+    """Drop the HNSW index."""
+    logger.info("Rolling back migration: add_embedding_hnsw_index")
+    await db_manager._init_postgres()
+
+    try:
+        async with db_manager._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("""
+                DROP INDEX CONCURRENTLY IF EXISTS idx_memories_embedding_hnsw
+            """))
+        logger.info("✅ Rollback completed")
+
+    except Exception as e:
+        logger.error(f"Rollback failed: {e}")
+        raise
+    finally:
+        await db_manager.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "rollback":
+        asyncio.run(rollback())
+    else:
+        asyncio.run(migrate())
@@ -0,0 +1,68 @@
+"""Add a partial index on memories.created_at for entity memories.
+
+expire_old_memories deletes entity memories older than their TTL; with this
+index the victims are found by an index range scan instead of a full scan
+of the memories table. Built CONCURRENTLY, so it must run outside a
+transaction.
+
+Run: python -m migrations.add_entity_expiry_index
+"""
+
+import asyncio
+import logging
+from sqlalchemy import text
+from app.database import create_index_concurrently, db_manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def migrate():
+    """Create the partial index on entity creation times."""
+    logger.info("Starting migration: add_entity_expiry_index")
+    await db_manager._init_postgres()
+
+    try:
+        async with db_manager._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await create_index_concurrently(conn, "idx_memories_entity_expiry", """
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_entity_expiry
+                ON memories (created_at)
+                WHERE type = 'entity'
+            """)
+        logger.info("✅ Entity expiry index created")
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        raise
+    finally:
+        await db_manager.close()
+
+
+async def rollback():
+    """Drop the entity expiry index."""
+    logger.info("Rolling back migration: add_entity_expiry_index")
+    await db_manager._init_postgres()
+
+    try:
+        async with db_manager._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("""
+                DROP INDEX CONCURRENTLY IF EXISTS idx_memories_entity_expiry
+            """))
+        logger.info("✅ Rollback completed")
+
+    except Exception as e:
+        logger.error(f"Rollback failed: {e}")
+        raise
+    finally:
+        await db_manager.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "rollback":
+        asyncio.run(rollback())
+    else:
+        asyncio.run(migrate())
@@ -9,7 +9,7 @@ from sqlalchemy import text
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.database import db_manager
+from app.database import create_index_concurrently, db_manager
 
 logger = logging.getLogger(__name__)
 
@@ -25,14 +25,16 @@ async def migrate():
             ADD COLUMN IF NOT EXISTS last_used_turn INTEGER DEFAULT NULL
         """))
 
-        # Create index for performance
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_memories_last_used_turn 
-            ON memories(last_used_turn)
-        """))
-
         await session.commit()
 
+    # Create index for performance, concurrently so writes aren't blocked
+    async with db_manager._engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await create_index_concurrently(conn, "idx_memories_last_used_turn", """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_last_used_turn 
+            ON memories(last_used_turn)
+        """)
+
     logger.info("✅ Added last_used_turn column to memories table")
     await db_manager.close()
 
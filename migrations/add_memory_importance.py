@@ -11,11 +11,25 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.database import db_manager
+from app.database import create_index_concurrently, db_manager
 from app.config import get_settings
 
 settings = get_settings()
 
+MIGRATION_NAME = "add_memory_importance"
+
+# Applied migrations, so one-off data backfills are skipped on re-runs
+_CREATE_SCHEMA_MIGRATIONS_SQL = text("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        name TEXT PRIMARY KEY,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+    )
+""")
+
+_MIGRATION_APPLIED_SQL = text("SELECT 1 FROM schema_migrations WHERE name = :name")
+
+_RECORD_MIGRATION_SQL = text("INSERT INTO schema_migrations (name) VALUES (:name)")
+
 
 async def migrate():
     """Add importance_score and importance_level columns to memories table"""
@@ -39,40 +53,47 @@ async def migrate():
                 ADD COLUMN IF NOT EXISTS importance_level VARCHAR(20) DEFAULT 'medium'
             """))
             
-            # Create index on importance_score for fast sorting
-            await conn.execute(text("""
-                CREATE INDEX IF NOT EXISTS idx_memories_importance 
+            # The backfill rewrites rows, so it must only ever run once
+            await conn.execute(_CREATE_SCHEMA_MIGRATIONS_SQL)
+            applied = await conn.scalar(_MIGRATION_APPLIED_SQL, {"name": MIGRATION_NAME})
+            if applied:
+                print("Existing memories already backfilled, skipping")
+            else:
+                # Backfill both columns in a single pass over the table; each
+                # column still only changes where it holds its default
+                print("Updating existing memories with default weights...")
+                await conn.execute(text("""
+                    UPDATE memories 
+                    SET importance_score = CASE
+                            WHEN importance_score <> 0.7 THEN importance_score
+                            WHEN type = 'commitment' THEN 0.9 * confidence
+                            WHEN type = 'instruction' THEN 0.85 * confidence
+                            WHEN type = 'entity' THEN 0.8 * confidence
+                            WHEN type = 'preference' THEN 0.75 * confidence
+                            WHEN type = 'fact' THEN 0.7 * confidence
+                            ELSE 0.6 * confidence
+                        END,
+                        importance_level = CASE
+                            WHEN importance_level <> 'medium' THEN importance_level
+                            WHEN lower(content) LIKE '%my name%' 
+                                OR lower(content) LIKE '%i am%'
+                                OR lower(content) LIKE '%call me%' THEN 'critical'
+                            WHEN type IN ('commitment', 'instruction') THEN 'high'
+                            WHEN type IN ('preference', 'entity') THEN 'medium'
+                            ELSE 'low'
+                        END
+                    WHERE importance_score = 0.7 OR importance_level = 'medium'
+                """))
+                await conn.execute(_RECORD_MIGRATION_SQL, {"name": MIGRATION_NAME})
+        
+        # Build the index after the backfill so the UPDATE doesn't maintain it,
+        # and concurrently (outside a transaction) so writes aren't blocked
+        async with db_manager._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await create_index_concurrently(conn, "idx_memories_importance", """
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_importance 
                 ON memories(importance_score DESC)
-            """))
-            
-            # Update existing memories with calculated weights
-            print("Updating existing memories with default weights...")
-            await conn.execute(text("""
-                UPDATE memories 
-                SET importance_score = CASE 
-                    WHEN type = 'commitment' THEN 0.9
-                    WHEN type = 'instruction' THEN 0.85
-                    WHEN type = 'entity' THEN 0.8
-                    WHEN type = 'preference' THEN 0.75
-                    WHEN type = 'fact' THEN 0.7
-                    ELSE 0.6
-                END * confidence
-                WHERE importance_score = 0.7
-            """))
-            
-            # Set importance levels based on type
-            await conn.execute(text("""
-                UPDATE memories
-                SET importance_level = CASE
-                    WHEN lower(content) LIKE '%my name%' 
-                        OR lower(content) LIKE '%i am%'
-                        OR lower(content) LIKE '%call me%' THEN 'critical'
-                    WHEN type IN ('commitment', 'instruction') THEN 'high'
-                    WHEN type IN ('preference', 'entity') THEN 'medium'
-                    ELSE 'low'
-                END
-                WHERE importance_level = 'medium'
-            """))
+            """)
         
         print("✅ Migration completed successfully!")
         print("- Added importance_score column")
@@ -0,0 +1,86 @@
+"""Store memories.embedding as halfvec(384) instead of vector(384).
+
+halfvec keeps each dimension as a 2-byte float, halving the per-row
+embedding size (1536 -> 768 bytes) and the HNSW index with it. Cosine
+recall is practically unchanged for normalised sentence embeddings.
+Requires pgvector 0.7+.
+
+The HNSW index is dropped first (its vector_cosine_ops operator class
+can't follow the type change) and rebuilt concurrently with
+halfvec_cosine_ops afterwards. On tables already using halfvec this is
+a no-op apart from ensuring the index exists.
+
+Run: python -m migrations.convert_embedding_to_halfvec
+     python -m migrations.convert_embedding_to_halfvec rollback
+"""
+
+import asyncio
+import logging
+from sqlalchemy import text
+from app.database import create_index_concurrently, db_manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_EMBEDDING_TYPE_SQL = text("""
+    SELECT format_type(atttypid, atttypmod)
+    FROM pg_attribute
+    WHERE attrelid = 'memories'::regclass AND attname = 'embedding'
+""")
+
+
+async def _convert(target_type: str, opclass: str):
+    """Retype the embedding column and rebuild its HNSW index."""
+    await db_manager._init_postgres()
+
+    try:
+        async with db_manager._engine.begin() as conn:
+            current_type = await conn.scalar(_EMBEDDING_TYPE_SQL)
+            if current_type != target_type:
+                await conn.execute(text("DROP INDEX IF EXISTS idx_memories_embedding_hnsw"))
+                await conn.execute(text(f"""
+                    ALTER TABLE memories
+                    ALTER COLUMN embedding TYPE {target_type} USING embedding::{target_type}
+                """))
+                logger.info(f"✅ embedding converted from {current_type} to {target_type}")
+
+        async with db_manager._engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await create_index_concurrently(conn, "idx_memories_embedding_hnsw", f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_embedding_hnsw
+                ON memories USING hnsw (embedding {opclass})
+                WITH (m = 16, ef_construction = 64)
+            """)
+        logger.info("✅ HNSW index ready")
+
+    finally:
+        await db_manager.close()
+
+
+async def migrate():
+    """Convert the embedding column to halfvec."""
+    logger.info("Starting migration: convert_embedding_to_halfvec")
+    try:
+        await _convert("halfvec(384)", "halfvec_cosine_ops")
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        raise
+
+
+async def rollback():
+    """Convert the embedding column back to vector."""
+    logger.info("Rolling back migration: convert_embedding_to_halfvec")
+    try:
+        await _convert("vector(384)", "vector_cosine_ops")
+    except Exception as e:
+        logger.error(f"Rollback failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "rollback":
+        asyncio.run(rollback())
+    else:
+        asyncio.run(migrate())
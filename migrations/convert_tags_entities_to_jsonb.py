@@ -0,0 +1,112 @@
+"""Convert memories.tags and memories.entities to JSONB.
+
+Older deployments stored these columns as TEXT holding json.dumps output.
+As JSONB the driver decodes them straight to Python lists, so storage no
+longer round-trips them through json.dumps/json.loads. On tables that
+already use JSONB this is a no-op.
+
+Run: python -m migrations.convert_tags_entities_to_jsonb
+     python -m migrations.convert_tags_entities_to_jsonb rollback
+"""
+
+import asyncio
+import logging
+from sqlalchemy import text
+from app.database import db_manager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+_COLUMN_TYPES_SQL = text("""
+    SELECT column_name, data_type
+    FROM information_schema.columns
+    WHERE table_name = 'memories' AND column_name IN ('tags', 'entities')
+""")
+
+
+async def _column_types(conn) -> dict:
+    """Return the current data_type of tags and entities, by column name."""
+    result = await conn.execute(_COLUMN_TYPES_SQL)
+    return {row.column_name: row.data_type for row in result}
+
+
+async def migrate():
+    """Alter tags and entities columns to JSONB."""
+    logger.info("Starting migration: convert_tags_entities_to_jsonb")
+    await db_manager._init_postgres()
+
+    try:
+        async with db_manager._engine.begin() as conn:
+            column_types = await _column_types(conn)
+            if all(data_type == "jsonb" for data_type in column_types.values()):
+                logger.info("tags and entities are already JSONB, nothing to do")
+                return
+
+            await conn.execute(text("""
+                ALTER TABLE memories
+                    ALTER COLUMN tags DROP DEFAULT,
+                    ALTER COLUMN entities DROP DEFAULT
+            """))
+            await conn.execute(text("""
+                ALTER TABLE memories
+                    ALTER COLUMN tags TYPE JSONB USING COALESCE(NULLIF(tags::text, ''), '[]')::jsonb,
+                    ALTER COLUMN entities TYPE JSONB USING COALESCE(NULLIF(entities::text, ''), '[]')::jsonb
+            """))
+            await conn.execute(text("""
+                ALTER TABLE memories
+                    ALTER COLUMN tags SET DEFAULT '[]'::jsonb,
+                    ALTER COLUMN entities SET DEFAULT '[]'::jsonb
+            """))
+        logger.info("✅ tags and entities are JSONB")
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        raise
+    finally:
+        await db_manager.close()
+
+
+async def rollback():
+    """Alter tags and entities columns back to TEXT holding JSON."""
+    logger.info("Rolling back migration: convert_tags_entities_to_jsonb")
+    await db_manager._init_postgres()
+
+    try:
+        async with db_manager._engine.begin() as conn:
+            column_types = await _column_types(conn)
+            if all(data_type == "text" for data_type in column_types.values()):
+                logger.info("tags and entities are already TEXT, nothing to do")
+                return
+
+            await conn.execute(text("""
+                ALTER TABLE memories
+                    ALTER COLUMN tags DROP DEFAULT,
+                    ALTER COLUMN entities DROP DEFAULT
+            """))
+            await conn.execute(text("""
+                ALTER TABLE memories
+                    ALTER COLUMN tags TYPE TEXT USING tags::text,
+                    ALTER COLUMN entities TYPE TEXT USING entities::text
+            """))
+            await conn.execute(text("""
+                ALTER TABLE memories
+                    ALTER COLUMN tags SET DEFAULT '[]',
+                    ALTER COLUMN entities SET DEFAULT '[]'
+            """))
+        logger.info("✅ tags and entities are TEXT")
+
+    except Exception as e:
+        logger.error(f"Rollback failed: {e}")
+        raise
+    finally:
+        await db_manager.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "rollback":
+        asyncio.run(rollback())
+    else:
+        asyncio.run(migrate())
@@ -10,125 +10,131 @@ from sqlalchemy import text
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config import get_settings
-from app.database import db_manager
+from app.database import create_index_concurrently, db_manager
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Tables are created first; conversation_turns references conversations
+CREATE_VECTOR_EXTENSION_SQL = "CREATE EXTENSION IF NOT EXISTS vector"
+
+CREATE_MEMORIES_SQL = """
+    CREATE TABLE IF NOT EXISTS memories (
+        memory_id UUID PRIMARY KEY,
+        user_id VARCHAR(255) NOT NULL,
+        type VARCHAR(50) NOT NULL,
+        content TEXT NOT NULL,
+        embedding halfvec(384),
+        source_turn INTEGER NOT NULL,
+        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        last_accessed TIMESTAMP,
+        access_count INTEGER DEFAULT 0,
+        confidence FLOAT NOT NULL,
+        decay_score FLOAT DEFAULT 1.0,
+        tags JSONB DEFAULT '[]'::jsonb,
+        entities JSONB DEFAULT '[]'::jsonb,
+        context JSONB DEFAULT '{}'::jsonb
+    )
+"""
+
+CREATE_CONVERSATIONS_SQL = """
+    CREATE TABLE IF NOT EXISTS conversations (
+        conversation_id UUID PRIMARY KEY,
+        user_id VARCHAR(255) NOT NULL,
+        title VARCHAR(500),
+        created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        is_archived BOOLEAN DEFAULT FALSE,
+        turn_count INTEGER DEFAULT 0,
+        metadata JSONB DEFAULT '{}'::jsonb
+    )
+"""
+
+CREATE_CONVERSATION_TURNS_SQL = """
+    CREATE TABLE IF NOT EXISTS conversation_turns (
+        turn_id UUID PRIMARY KEY,
+        conversation_id UUID NOT NULL,
+        user_id VARCHAR(255) NOT NULL,
+        turn_number INTEGER NOT NULL,
+        user_message TEXT NOT NULL,
+        assistant_message TEXT,
+        timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
+        metadata JSONB DEFAULT '{}'::jsonb,
+        memories_retrieved UUID[],
+        memories_created UUID[],
+        FOREIGN KEY (conversation_id) REFERENCES conversations(conversation_id) ON DELETE CASCADE
+    )
+"""
+
+# Index builds per table, keyed by index name. CREATE INDEX CONCURRENTLY
+# can't run inside a transaction (so re-running against a live database
+# doesn't block writes), and two concurrent builds on one table would just
+# wait on each other, so each table's indexes run in order on their own
+# autocommit connection.
+INDEX_SQLS = {
+    "memories": {
+        "idx_memories_user_id": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_user_id ON memories(user_id)",
+        "idx_memories_type": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_type ON memories(type)",
+        "idx_memories_source_turn": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_source_turn ON memories(source_turn)",
+        "idx_memories_created_at": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_created_at ON memories(created_at DESC)",
+        "idx_memories_confidence": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_confidence ON memories(confidence)",
+        # Same definition as migrations/add_embedding_hnsw_index.py
+        "idx_memories_embedding_hnsw": (
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_memories_embedding_hnsw "
+            "ON memories USING hnsw (embedding halfvec_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        ),
+    },
+    "conversations": {
+        "idx_conversations_user_id": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_user_id ON conversations(user_id)",
+        "idx_conversations_updated_at": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_updated_at ON conversations(updated_at DESC)",
+        "idx_conversations_archived": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_conversations_archived ON conversations(is_archived)",
+    },
+    "conversation_turns": {
+        "idx_turns_conversation_id": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_turns_conversation_id ON conversation_turns(conversation_id)",
+        "idx_turns_user_id": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_turns_user_id ON conversation_turns(user_id)",
+        "idx_turns_number": "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_turns_number ON conversation_turns(turn_number)",
+    },
+}
+
+
+async def _execute_in_order(*statements: str):
+    """Run statements in order on a dedicated pooled connection."""
+    async with db_manager._engine.connect() as conn:
+        for statement in statements:
+            await conn.execute(text(statement))
+        await conn.commit()
+
+
+async def _create_indexes_in_order(indexes: dict):
+    """Build indexes in order on a dedicated autocommit connection, checking each is valid."""
+    async with db_manager._engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for name, create_sql in indexes.items():
+            await create_index_concurrently(conn, name, create_sql)
+
+
+async def create_tables():
+    """Create tables, independent ones in parallel."""
+    await asyncio.gather(
+        _execute_in_order(CREATE_VECTOR_EXTENSION_SQL, CREATE_MEMORIES_SQL),
+        _execute_in_order(CREATE_CONVERSATIONS_SQL, CREATE_CONVERSATION_TURNS_SQL),
+    )
+
+
+async def create_indexes():
+    """Create indexes, one connection per table in parallel."""
+    await asyncio.gather(*(
+        _create_indexes_in_order(indexes)
+        for indexes in INDEX_SQLS.values()
+    ))
+
 
 async def create_schema():
     """Create database schema."""
     await db_manager.initialize()
 
-    async with db_manager.get_session() as session:
-        # Create memories table
-        await session.execute(text("""
-            CREATE TABLE IF NOT EXISTS memories (
-                memory_id UUID PRIMARY KEY,
-                user_id VARCHAR(255) NOT NULL,
-                type VARCHAR(50) NOT NULL,
-                content TEXT NOT NULL,
-                embedding vector(384),
-                source_turn INTEGER NOT NULL,
-                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                last_accessed TIMESTAMP,
-                access_count INTEGER DEFAULT 0,
-                confidence FLOAT NOT NULL,
-                decay_score FLOAT DEFAULT 1.0,
-                tags JSONB DEFAULT '[]'::jsonb,
-                entities JSONB DEFAULT '[]'::jsonb,
-                context JSONB DEFAULT '{}'::jsonb
-            )
-        """))
-
-        # Create indexes
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_memories_user_id 
-            ON memories(user_id)
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_memories_type 
-            ON memories(type)
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_memories_source_turn 
-            ON memories(source_turn)
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_memories_created_at 
-            ON memories(created_at DESC)
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_memories_confidence 
-            ON memories(confidence)
-        """))
-
-        # Create conversations table
-        await session.execute(text("""
-            CREATE TABLE IF NOT EXISTS conversations (
-                conversation_id UUID PRIMARY KEY,
-                user_id VARCHAR(255) NOT NULL,
-                title VARCHAR(500),
-                created_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
-                is_archived BOOLEAN DEFAULT FALSE,
-                turn_count INTEGER DEFAULT 0,
-                metadata JSONB DEFAULT '{}'::jsonb
-            )
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_conversations_user_id 
-            ON conversations(user_id)
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_conversations_updated_at 
-            ON conversations(updated_at DESC)
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_conversations_archived 
-            ON conversations(is_archived)
-        """))
-
-        # Create conversation_turns table
-        await session.execute(text("""
-            CREATE TABLE IF NOT EXISTS conversation_turns (
-                turn_id UUID PRIMARY KEY,
-                conversation_id UUID NOT NULL,
-                user_id VARCHAR(255) NOT NULL,
-                turn_number INTEGER NOT NULL,
-                user_message TEXT NOT NULL,
-                assistant_message TEXT,
-                timestamp TIMESTAMP NOT NULL DEFAULT NOW(),
-                metadata JSONB DEFAULT '{}'::jsonb,
-                memories_retrieved UUID[],
-                memories_created UUID[],
-                FOREIGN KEY (conversation_id) REFERENCES conversations(conversation_id) ON DELETE CASCADE
-            )
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_turns_conversation_id 
-            ON conversation_turns(conversation_id)
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_turns_user_id 
-            ON conversation_turns(user_id)
-        """))
-
-        await session.execute(text("""
-            CREATE INDEX IF NOT EXISTS idx_turns_number 
-            ON conversation_turns(turn_number)
-        """))
-
-        await session.commit()
+    await create_tables()
+    await create_indexes()
 
     logger.info("Database schema created successfully")
     await db_manager.close()
@@ -1,7 +1,11 @@
 """Quick development setup check."""
 
+import shutil
 import sys
-import subprocess
+from importlib.util import find_spec
+
+# Checked for presence only; importing them (openai especially) is slow
+REQUIRED_MODULES = ("fastapi", "openai", "pinecone", "redis", "sqlalchemy")
 
 
 def check_python_version():
@@ -16,16 +20,11 @@ def check_python_version():
 
 
 def check_command(cmd, name):
-    """Check if a command is available."""
-    try:
-        subprocess.run(
-            [cmd, "--version"],
-            capture_output=True,
-            check=True,
-        )
+    """Check if a command is available on PATH."""
+    if shutil.which(cmd):
         print(f"✓ {name} installed")
         return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    else:
         print(f"✗ {name} not found")
         return False
 
@@ -43,18 +42,13 @@ def check_env_file():
 
 def check_dependencies():
     """Check if dependencies are installed."""
-    try:
-        import fastapi
-        import openai
-        import pinecone
-        import redis
-        import sqlalchemy
-        print("✓ Python dependencies installed")
-        return True
-    except ImportError as e:
-        print(f"✗ Missing dependency: {e.name}")
+    missing = [module for module in REQUIRED_MODULES if find_spec(module) is None]
+    if missing:
+        print(f"✗ Missing dependencies: {', '.join(missing)}")
         print("  Run: pip install -r requirements.txt")
         return False
+    print("✓ Python dependencies installed")
+    return True
 
 
 def main():
@@ -58,8 +58,8 @@ async def test_pinecone():
         
         pc = Pinecone(api_key=settings.pinecone_api_key)
         
-        # List indexes
-        indexes = pc.list_indexes()
+        # List indexes (blocking client, so off the event loop)
+        indexes = await asyncio.to_thread(pc.list_indexes)
         
         print_status("Pinecone API", True, f"Connected to {settings.pinecone_environment}")
         
@@ -95,31 +95,23 @@ async def test_postgres():
             timeout=5,
         )
         
-        # Test query
-        result = await conn.fetchval("SELECT 1")
-        await conn.close()
-        
-        if result == 1:
-            print_status("PostgreSQL", True, f"Connected to {settings.postgres_host}:{settings.postgres_port}")
-            
-            # Check if pgvector is installed
-            conn = await asyncpg.connect(
-                host=settings.postgres_host,
-                port=settings.postgres_port,
-                database=settings.postgres_db,
-                user=settings.postgres_user,
-                password=settings.postgres_password,
-            )
-            try:
-                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
-                print("   📦 pgvector extension available")
-            except:
-                print("   ⚠️  pgvector extension not available")
-            finally:
-                await conn.close()
+        try:
+            # Test query
+            result = await conn.fetchval("SELECT 1")
             
-            return True
-        return False
+            if result == 1:
+                print_status("PostgreSQL", True, f"Connected to {settings.postgres_host}:{settings.postgres_port}")
+                
+                # Check if pgvector is installed, reusing the same connection
+                try:
+                    await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                    print("   📦 pgvector extension available")
+                except:
+                    print("   ⚠️  pgvector extension not available")
+        finally:
+            await conn.close()
+        
+        return result == 1
         
     except asyncpg.InvalidPasswordError:
         print_status("PostgreSQL", False, "Invalid password")
@@ -174,29 +166,20 @@ async def main():
     print("API Keys & Services Validation")
     print("=" * 60 + "\n")
     
-    print("Testing API Keys...")
-    print("-" * 60)
-    
-    results = []
-    
-    # Test OpenAI
-    openai_ok = await test_openai()
-    results.append(("OpenAI", openai_ok))
-    
-    # Test Pinecone
-    pinecone_ok = await test_pinecone()
-    results.append(("Pinecone", pinecone_ok))
-    
-    print("\nTesting Database Connections...")
+    print("Testing API Keys & Database Connections...")
     print("-" * 60)
     
-    # Test PostgreSQL
-    postgres_ok = await test_postgres()
-    results.append(("PostgreSQL", postgres_ok))
-    
-    # Test Redis
-    redis_ok = await test_redis()
-    results.append(("Redis", redis_ok))
+    # Probes are independent, so run them concurrently; a probe that
+    # raises counts as failed without cancelling the others
+    services = ("OpenAI", "Pinecone", "PostgreSQL", "Redis")
+    outcomes = await asyncio.gather(
+        test_openai(),
+        test_pinecone(),
+        test_postgres(),
+        test_redis(),
+        return_exceptions=True,
+    )
+    results = [(service, ok is True) for service, ok in zip(services, outcomes)]
     
     # Summary
     print("\n" + "=" * 60)
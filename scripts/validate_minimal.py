@@ -32,7 +32,7 @@ async def test_pinecone_only():
     try:
         from pinecone import Pinecone
         pc = Pinecone(api_key=settings.pinecone_api_key)
-        pc.list_indexes()
+        await asyncio.to_thread(pc.list_indexes)
         print("✅ Pinecone API: Working")
         return True
     except Exception as e:
@@ -46,11 +46,14 @@ async def main():
     print("Minimal API Validation (No Docker Required)")
     print("=" * 60 + "\n")
     
-    openai_ok = await test_openai_only()
-    pinecone_ok = await test_pinecone_only()
+    openai_ok, pinecone_ok = await asyncio.gather(
+        test_openai_only(),
+        test_pinecone_only(),
+        return_exceptions=True,
+    )
     
     print("\n" + "=" * 60)
-    if openai_ok and pinecone_ok:
+    if openai_ok is True and pinecone_ok is True:
         print("✅ Core APIs working! You can proceed without Docker.")
         print("\nNote: Full system requires PostgreSQL + Redis.")
         print("For now, you can test with in-memory storage.")
@@ -1,18 +1,109 @@
 """Test configuration and fixtures."""
 
-import asyncio
+from types import MappingProxyType, SimpleNamespace
+
 import pytest
+import respx
+from httpx import ASGITransport, AsyncClient
+from pytest_asyncio import is_async_test
 from unittest.mock import AsyncMock, MagicMock
 
 from app.config import get_settings
 
+# Built once and shared by every mock_openai_client; treat as read-only
+_FAKE_EMBEDDING = [0.1] * 1536
+
+# Shared Pinecone responses; the empty tuple and read-only mapping can't
+# leak state from one test into the next
+_EMPTY_QUERY_RESULT = SimpleNamespace(matches=())
+_EMPTY_INDEX_STATS = MappingProxyType({"total_vector_count": 0})
+
+
+def _chat_completion(content: str) -> dict:
+    """An OpenAI-compatible chat completion body (Groq uses the same shape)."""
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "test",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30},
+    }
+
+
+@pytest.fixture(autouse=True)
+def mock_llm_http():
+    """Stub the LLM providers at the HTTP transport for every test.
+    
+    No test reaches the network or depends on API keys in the environment;
+    any other request made through httpx fails loudly as unmocked.
+    """
+    with respx.mock(assert_all_called=False) as router:
+        router.post("https://api.openai.com/v1/embeddings", name="openai_embeddings").respond(json={
+            "object": "list",
+            "data": [{"object": "embedding", "index": 0, "embedding": _FAKE_EMBEDDING}],
+            "model": "test",
+            "usage": {"prompt_tokens": 1, "total_tokens": 1},
+        })
+        router.post("https://api.openai.com/v1/chat/completions", name="openai_chat").respond(
+            json=_chat_completion("Test response")
+        )
+        router.post("https://api.groq.com/openai/v1/chat/completions", name="groq_chat").respond(
+            json=_chat_completion("Test response")
+        )
+        yield router
+
 
 @pytest.fixture
+def llm_reply(mock_llm_http):
+    """Set the content the stubbed chat completions return."""
+    def reply(content: str):
+        for name in ("openai_chat", "groq_chat"):
+            mock_llm_http[name].respond(json=_chat_completion(content))
+    return reply
+
+
+@pytest.fixture(scope="session")
 def settings():
-    """Get test settings."""
+    """Get test settings (cached by get_settings, shared across the session)."""
     return get_settings()
 
 
+@pytest.fixture(scope="session")
+def app_instance():
+    """The FastAPI app, imported only by tests that need it."""
+    from app.main import app
+    return app
+
+
+@pytest.fixture(scope="session")
+async def client(app_instance):
+    """One in-process ASGI client shared by every API test in the session.
+    
+    The lifespan isn't run, so no database or Redis connections are opened.
+    """
+    async with AsyncClient(transport=ASGITransport(app=app_instance), base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def embedder():
+    """One embedding generator (and its model) shared by the whole session."""
+    from app.utils.embeddings import EmbeddingGenerator
+    return EmbeddingGenerator(redis_client=None)
+
+
+@pytest.fixture
+def retriever(embedder):
+    """A MemoryRetriever on the shared embedder with a mocked Redis."""
+    from app.services.retriever import MemoryRetriever
+    return MemoryRetriever(redis_client=MagicMock(), embedding_generator=embedder)
+
+
 @pytest.fixture
 def mock_redis():
     """Mock Redis client."""
@@ -28,10 +119,10 @@ def mock_redis():
 def mock_pinecone_index():
     """Mock Pinecone index."""
     mock = MagicMock()
-    mock.query.return_value = MagicMock(matches=[])
+    mock.query.return_value = _EMPTY_QUERY_RESULT
     mock.upsert.return_value = None
     mock.delete.return_value = None
-    mock.describe_index_stats.return_value = {"total_vector_count": 0}
+    mock.describe_index_stats.return_value = _EMPTY_INDEX_STATS
     return mock
 
 
@@ -42,7 +133,7 @@ def mock_openai_client():
     
     # Mock embeddings
     mock.embeddings.create.return_value = MagicMock(
-        data=[MagicMock(embedding=[0.1] * 1536)]
+        data=[MagicMock(embedding=_FAKE_EMBEDDING)]
     )
     
     # Mock chat completions
@@ -80,9 +171,9 @@ def sample_conversation_request():
     }
 
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create event loop for async tests."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def pytest_collection_modifyitems(items):
+    """Run every async test in the session loop its fixtures live in."""
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
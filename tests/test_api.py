@@ -1,23 +1,26 @@
 """Tests for API endpoints."""
 
+from uuid import uuid4
+
 import pytest
-from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
 
-from app.main import app
-
-
-client = TestClient(app)
+from app.api import routes
+from app.api.dependencies import get_current_user
+from app.api.routes import get_embedding_generator, get_memory_retriever
+from app.models.auth import User
+from app.models.conversation import ConversationResponse
+from app.models.memory import Memory, MemoryMetadata, MemorySearchResult, MemoryType
 
 
-def test_root_endpoint():
+async def test_root_endpoint(client):
     """Test root endpoint."""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     assert "service" in response.json()
 
 
-def test_health_endpoint():
+async def test_health_endpoint(client):
     """Test health check endpoint."""
     with patch("app.database.db_manager.health_check") as mock_health:
         mock_health.return_value = {
@@ -26,14 +29,14 @@ def test_health_endpoint():
             "pinecone": "healthy",
         }
         
-        response = client.get("/api/v1/health")
+        response = await client.get("/api/v1/health")
         assert response.status_code in [200, 503]  # May fail if services not running
 
 
 @pytest.mark.skip(reason="Requires full setup")
-def test_conversation_endpoint(sample_conversation_request):
+async def test_conversation_endpoint(client, sample_conversation_request):
     """Test conversation processing endpoint."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/conversation",
         json=sample_conversation_request,
     )
@@ -43,9 +46,9 @@ def test_conversation_endpoint(sample_conversation_request):
 
 
 @pytest.mark.skip(reason="Requires full setup")
-def test_create_memory(sample_memory_data):
+async def test_create_memory(client, sample_memory_data):
     """Test memory creation endpoint."""
-    response = client.post(
+    response = await client.post(
         "/api/v1/memories",
         json=sample_memory_data,
     )
@@ -54,8 +57,109 @@ def test_create_memory(sample_memory_data):
     assert response.status_code in [201, 500]
 
 
-def test_metrics_endpoint():
+async def test_metrics_endpoint(client):
     """Test metrics export endpoint."""
-    response = client.get("/api/v1/metrics")
+    response = await client.get("/api/v1/metrics")
     assert response.status_code == 200
     assert response.headers["content-type"] == "text/plain; charset=utf-8"
+
+
+async def test_search_batch(client, app_instance):
+    """Batch search returns one result list per query, in query order."""
+    class EchoRetriever:
+        async def search(self, query):
+            memory = Memory(
+                user_id=query.user_id,
+                type=MemoryType.FACT,
+                content=query.query,
+                metadata=MemoryMetadata(source_turn=1, confidence=0.9),
+            )
+            return [MemorySearchResult(
+                memory=memory,
+                relevance_score=0.5,
+                similarity_score=0.5,
+                recency_score=0.5,
+                access_score=0.5,
+            )]
+
+    queries = ["name", "programming", "meeting", "preferences"]
+    app_instance.dependency_overrides[get_current_user] = lambda: User(
+        user_id="test_user_123", email="test@example.com", hashed_password="x"
+    )
+    app_instance.dependency_overrides[get_memory_retriever] = EchoRetriever
+    try:
+        response = await client.post(
+            "/api/v1/memories/search/batch",
+            json={"queries": queries, "top_k": 5},
+        )
+    finally:
+        app_instance.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert [results[0]["memory"]["content"] for results in response.json()] == queries
+
+
+async def test_warm_embeddings(client, app_instance):
+    """Warming embeds every text in one batch."""
+    embedder = AsyncMock()
+    texts = ["What do you know about me?", "Do you remember my preferences?"]
+    app_instance.dependency_overrides[get_current_user] = lambda: User(
+        user_id="test_user_123", email="test@example.com", hashed_password="x"
+    )
+    app_instance.dependency_overrides[get_embedding_generator] = lambda: embedder
+    try:
+        response = await client.post("/api/v1/embeddings/warm", json={"texts": texts})
+    finally:
+        app_instance.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.json() == {"warmed": 2}
+    embedder.generate_batch.assert_awaited_once_with(texts)
+
+
+async def test_conversation_batch(client, app_instance):
+    """Batched turns run in order and continue one conversation."""
+    conversation_id = uuid4()
+    seen = []
+
+    async def fake_process_conversation(request, current_user, **services):
+        seen.append(request.conversation_id)
+        return ConversationResponse(
+            turn_id=uuid4(),
+            conversation_id=conversation_id,
+            user_id=current_user.user_id,
+            turn_number=request.turn_number,
+            response=f"echo: {request.message}",
+            memories_used=[],
+            memories_extracted=0,
+            processing_time_ms=1.0,
+        )
+
+    messages = ["Hi, I'm Raj", "I live in Bangalore", "I like Python", "What do you know?"]
+    app_instance.dependency_overrides[get_current_user] = lambda: User(
+        user_id="test_user_123", email="test@example.com", hashed_password="x"
+    )
+    for dependency in (
+        routes.get_memory_storage,
+        routes.get_memory_retriever,
+        routes.get_memory_extractor,
+        routes.get_conversation_storage,
+        routes.get_conversation_manager,
+    ):
+        app_instance.dependency_overrides[dependency] = lambda: None
+    try:
+        with patch.object(routes, "process_conversation", fake_process_conversation):
+            response = await client.post(
+                "/api/v1/conversation/batch",
+                json={"turns": [
+                    {"turn_number": i, "message": m} for i, m in enumerate(messages, 1)
+                ]},
+            )
+    finally:
+        app_instance.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["conversation_id"] == str(conversation_id)
+    assert [r["response"] for r in data["responses"]] == [f"echo: {m}" for m in messages]
+    assert seen == [None] + [conversation_id] * 3
@@ -0,0 +1,23 @@
+"""Tests for memory conflict detection."""
+
+from app.utils.conflict_resolver import MemoryConflictResolver
+
+
+def test_quick_verdict_rules():
+    """Simple cases are decided without the LLM; the rest are left to it."""
+    verdict = MemoryConflictResolver._quick_verdict
+
+    assert verdict("Lives in Chennai", "lives in  chennai", "location") is False
+    assert verdict("28 years old", "30 years old", "age") is True
+    assert verdict("Age is 30", "30 years old", "age") is False
+    assert verdict("Works at Google", "works at Google.", "job") is False
+    assert verdict("Lives in Chennai", "Lives in Bangalore", "location") is None
+    assert verdict("Likes pizza", "Loves pizza", "preference") is None
+
+
+def test_content_categories():
+    """Categories are matched case-insensitively from the content."""
+    categories = MemoryConflictResolver._content_categories
+
+    assert categories("I Live In Chennai and work at Google") == {"location", "job"}
+    assert categories("Enjoys long walks") == frozenset()
@@ -0,0 +1,118 @@
+"""Tests for embedding generation."""
+
+import asyncio
+
+import numpy as np
+from unittest.mock import AsyncMock, MagicMock
+
+from app.utils.embeddings import EmbeddingGenerator, _decode_embedding, _encode_embedding
+
+
+def test_cached_embedding_is_float32():
+    """Cached embeddings are stored as 4-byte floats and decode losslessly."""
+    embedding = np.random.default_rng(0).random(384, dtype=np.float32).tolist()
+
+    raw = _encode_embedding(embedding)
+
+    assert len(raw) == 384 * 4
+    assert _decode_embedding(raw) == embedding
+
+
+def _bare_generator(client) -> EmbeddingGenerator:
+    """An OpenAI-backed generator without Redis, skipping model/client setup."""
+    generator = EmbeddingGenerator.__new__(EmbeddingGenerator)
+    generator.redis = None
+    generator.client = client
+    generator.model = "text-embedding-3-small"
+    generator.use_openai = True
+    generator._key_prefix = "embedding:test:"
+    return generator
+
+
+async def test_batch_is_single_request():
+    """A batch is embedded with one request, duplicates sent once, in order."""
+    texts = [f"text {i}" for i in range(32)]
+
+    async def create(input, model):
+        return MagicMock(data=[MagicMock(embedding=[float(t.split()[1])]) for t in input])
+
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(side_effect=create)
+    generator = _bare_generator(client)
+
+    embeddings = await generator.generate_batch(texts + texts[:4])
+
+    assert client.embeddings.create.call_count == 1
+    assert client.embeddings.create.call_args.kwargs["input"] == texts
+    assert embeddings == [[float(i)] for i in range(32)] + [[0.0], [1.0], [2.0], [3.0]]
+
+
+async def test_local_batch_is_single_encode():
+    """The local model gets every distinct text in one encode() call.
+
+    encode() length-sorts its whole input before forming mini-batches, so
+    handing it everything at once is what keeps padding waste down.
+    """
+    texts = [("word " * (i % 7 + 1)).strip() + f" {i}" for i in range(32)]
+
+    def encode(sentences, batch_size, convert_to_numpy, show_progress_bar):
+        return np.array([[float(s.rsplit(" ", 1)[1])] for s in sentences])
+
+    generator = _bare_generator(client=None)
+    generator.use_openai = False
+    generator.st_model = MagicMock()
+    generator.st_model.encode.side_effect = encode
+
+    embeddings = await generator.generate_batch(texts + texts[::-1], batch_size=4)
+
+    assert generator.st_model.encode.call_count == 1
+    assert generator.st_model.encode.call_args.args[0] == texts
+    assert embeddings == [[float(i)] for i in range(32)] + [[float(i)] for i in reversed(range(32))]
+
+
+async def test_coalesced_failure_is_isolated():
+    """A text the provider rejects fails only its own caller, not its batch."""
+    async def create(input, model):
+        if "bad" in input:
+            raise ValueError("input too long")
+        return MagicMock(data=[MagicMock(embedding=[float(t.split()[1])]) for t in input])
+
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(side_effect=create)
+    generator = _bare_generator(client)
+    generator._pending = []
+    generator._flush_task = None
+
+    results = await asyncio.gather(
+        generator.generate_coalesced("text 1"),
+        generator.generate_coalesced("bad"),
+        generator.generate_coalesced("text 2"),
+        return_exceptions=True,
+    )
+
+    assert results[0] == [1.0]
+    assert isinstance(results[1], ValueError)
+    assert results[2] == [2.0]
+
+
+async def test_cache_miss_is_looked_up_once():
+    """A text generate() just missed in Redis isn't looked up again in the batch."""
+    client = MagicMock()
+    client.embeddings.create = AsyncMock(
+        return_value=MagicMock(data=[MagicMock(embedding=[1.0])])
+    )
+    generator = _bare_generator(client)
+    generator._pending = []
+    generator._flush_task = None
+    generator.cache_ttl = 60
+    generator.redis = MagicMock()
+    generator.redis.getex = AsyncMock(return_value=None)
+    generator.redis.mget = AsyncMock(return_value=[None])
+    pipe = generator.redis.pipeline.return_value.__aenter__.return_value
+    pipe.execute = AsyncMock()
+
+    assert await generator.generate("text 1") == [1.0]
+
+    generator.redis.getex.assert_awaited_once()
+    generator.redis.mget.assert_not_called()
+    pipe.setex.assert_called_once()
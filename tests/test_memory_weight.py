@@ -0,0 +1,43 @@
+"""Tests for memory weighting and decay."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models.memory import MemoryType
+from app.utils.memory_weight import ImportanceLevel, MemoryWeightCalculator
+
+
+def test_vectorized_weights_match_scalar():
+    """The batch decay calculation agrees with the per-memory one."""
+    now = datetime.utcnow()
+    cases = [
+        (0.9, ImportanceLevel.CRITICAL, now - timedelta(days=400), 0, None),
+        (0.8, ImportanceLevel.HIGH, now - timedelta(days=30), 2, now - timedelta(days=1)),
+        (0.7, ImportanceLevel.MEDIUM, now - timedelta(days=140), 0, None),
+        (0.6, ImportanceLevel.LOW, now - timedelta(days=10), 10, now - timedelta(days=3)),
+        (0.5, ImportanceLevel.LOW, now - timedelta(days=2), 1, now - timedelta(days=20)),
+    ]
+
+    weights = MemoryWeightCalculator.calculate_current_weights(*zip(*cases), now=now)
+
+    for weight, (initial, level, created_at, access_count, last_accessed) in zip(weights, cases):
+        expected = MemoryWeightCalculator.calculate_current_weight(
+            initial_weight=initial,
+            importance_level=level,
+            created_at=created_at,
+            access_count=access_count,
+            last_accessed=last_accessed,
+            now=now,
+        )
+        assert weight == pytest.approx(expected, abs=1e-3)
+
+
+def test_initial_weight_by_memory_type():
+    """Without keywords, the memory type sets the base weight and level."""
+    calculate = MemoryWeightCalculator.calculate_initial_weight
+
+    assert calculate(MemoryType.COMMITMENT, "Buy milk", 1.0, {}) == (0.9, ImportanceLevel.HIGH)
+    assert calculate("preference", "Likes tea", 1.0, {}) == (0.75, ImportanceLevel.MEDIUM)
+    assert calculate(MemoryType.FACT, "Owns a bike", 1.0, {}) == (0.56, ImportanceLevel.LOW)
+    assert calculate(MemoryType.FACT, "My name is Sam", 0.5, {}) == (0.5, ImportanceLevel.CRITICAL)
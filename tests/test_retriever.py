@@ -1,22 +1,13 @@
 """Tests for memory retrieval service."""
 
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
-from app.models.memory import MemorySearchQuery, MemoryType
-from app.services.retriever import MemoryRetriever
-from app.utils.embeddings import EmbeddingGenerator
+from app.models.memory import MemorySearchQuery
 
 
-@pytest.mark.asyncio
-async def test_calculate_recency_score():
+async def test_calculate_recency_score(retriever):
     """Test recency score calculation."""
-    embedder = EmbeddingGenerator(redis_client=None)
-    retriever = MemoryRetriever(
-        redis_client=MagicMock(),
-        embedding_generator=embedder,
-    )
-    
     # Recent memory
     score = retriever._calculate_recency_score(
         source_turn=95,
@@ -32,14 +23,8 @@ async def test_calculate_recency_score():
     assert score < 0.5
 
 
-def test_calculate_relevance_score():
+def test_calculate_relevance_score(retriever):
     """Test composite relevance score calculation."""
-    embedder = EmbeddingGenerator(redis_client=None)
-    retriever = MemoryRetriever(
-        redis_client=MagicMock(),
-        embedding_generator=embedder,
-    )
-    
     score = retriever._calculate_relevance_score(
         similarity=0.9,
         recency=0.8,
@@ -51,15 +36,8 @@ def test_calculate_relevance_score():
     assert score > 0.7  # Should be high given good inputs
 
 
-@pytest.mark.asyncio
-async def test_search_with_empty_results(mock_redis, mock_pinecone_index):
+async def test_search_with_empty_results(retriever, embedder, mock_pinecone_index):
     """Test search with no results."""
-    embedder = EmbeddingGenerator(redis_client=mock_redis)
-    retriever = MemoryRetriever(
-        redis_client=mock_redis,
-        embedding_generator=embedder,
-    )
-    
     # Mock Pinecone to return no matches
     retriever.pinecone_index = mock_pinecone_index
     mock_pinecone_index.query.return_value = MagicMock(matches=[])
@@ -71,7 +49,19 @@ async def test_search_with_empty_results(mock_redis, mock_pinecone_index):
     )
     
     # Mock embedding generation
-    with pytest.mock.patch.object(embedder, 'generate', return_value=[0.1] * 1536):
+    with patch.object(embedder, 'generate', return_value=[0.1] * 1536):
         results = await retriever.search(query)
     
     assert isinstance(results, list)
+
+
+def test_recency_scores_match_scalar(retriever):
+    """The batch recency calculation agrees with the per-memory one."""
+    source_turns = [95, 0, 100, 120, 400]
+
+    for current_turn in (0, 100, 1000):
+        scores = retriever._calculate_recency_scores(source_turns, current_turn)
+
+        assert scores.shape == (len(source_turns),)
+        for score, source_turn in zip(scores, source_turns):
+            assert score == pytest.approx(retriever._calculate_recency_score(source_turn, current_turn))
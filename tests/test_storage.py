@@ -0,0 +1,55 @@
+"""Tests for memory storage helpers."""
+
+from app.models.memory import Memory, MemoryMetadata, MemoryType
+from app.services.storage import (
+    CACHE_SCHEMA_VERSION,
+    _LZ4_TAG,
+    _pack_memories,
+    _pack_memory,
+    _unpack_memories,
+    _unpack_memory,
+)
+
+
+def _make_memory(settings) -> Memory:
+    return Memory(
+        user_id="test_user_123",
+        type=MemoryType.PREFERENCE,
+        content="User prefers dark mode interface",
+        embedding=[0.25] * settings.memory_embedding_dimension,
+        metadata=MemoryMetadata(source_turn=1, confidence=0.9, tags=["ui"]),
+    )
+
+
+def test_cache_payload_round_trip(settings):
+    """Packed memories decode back to the same memory."""
+    memory = _make_memory(settings)
+
+    restored = _unpack_memory(_pack_memory(memory))
+
+    assert restored == memory
+
+
+def test_cache_payload_version_mismatch(settings):
+    """Payloads from another schema version are treated as misses."""
+    payload = b"\x00" + _pack_memory(_make_memory(settings))[1:]
+
+    assert _unpack_memory(payload) is None
+
+
+def test_cache_list_payload_round_trip(settings):
+    """Packed memory lists decode back in order, including empty lists."""
+    memories = [_make_memory(settings), _make_memory(settings)]
+
+    assert _unpack_memories(_pack_memories(memories)) == memories
+    assert _unpack_memories(_pack_memories([])) == []
+
+
+def test_cache_payload_compression(settings):
+    """Large payloads are lz4-compressed; small ones are stored as-is."""
+    memory = _make_memory(settings)
+    small = memory.model_copy(update={"embedding": None})
+
+    assert _pack_memory(memory)[:1] == _LZ4_TAG
+    assert _pack_memory(small)[:1] == CACHE_SCHEMA_VERSION
+    assert _unpack_memory(_pack_memory(small)) == small
@@ -0,0 +1,22 @@
+"""Tests for temporal reference parsing."""
+
+from datetime import datetime
+
+from app.utils.temporal import parse_temporal_reference
+
+
+def test_months_are_calendar_months():
+    """Month offsets land on the same day of the month, clamped at month end."""
+    _, next_month = parse_temporal_reference("dentist next month", datetime(2024, 1, 15, 9, 0))
+    assert next_month == datetime(2024, 2, 15, 9, 0)
+
+    _, clamped = parse_temporal_reference("renewal in 1 month", datetime(2024, 1, 31))
+    assert clamped == datetime(2024, 2, 29)
+
+    _, over_year = parse_temporal_reference("trip in 3 months", datetime(2024, 11, 30))
+    assert over_year == datetime(2025, 2, 28)
+
+
+def test_no_temporal_reference():
+    """Text without a temporal phrase comes back unchanged."""
+    assert parse_temporal_reference("I like green tea") == ("I like green tea", None)